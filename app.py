@@ -1,25 +1,440 @@
-from flask import Flask, render_template, request, session, redirect, url_for
-import requests
-import feedparser
+from flask import Flask, Response, render_template, stream_template, request, session, redirect, url_for, jsonify, g
+from flask import before_render_template, make_response, template_rendered
+from werkzeug.http import is_resource_modified
+from datetime import datetime
+from typing import Optional
+import atexit
+import functools
+import hashlib
 import os
-
+import tempfile
+import threading
+import time
+
+import arxiv
+
+import export
+import gateway
+import metrics
+from author_index import author_key
+from fragment_cache import FragmentCache
+from pagination import PageCursor
+from paper_cache import is_arxiv_id, normalize_arxiv_id
+from query_cache import QueryCache
+from query_planner import plan_query
 from search_strategy import ArxivSearchStrategy
 
 app = Flask(__name__)
 app.secret_key = "dev-secret-key-change-later"
 
-strategy = ArxivSearchStrategy()
+# Sessions live server-side; the cookie only carries a signed session ID.
+# SESSION_BACKEND=sqlite (default, shared by workers), memory, or cookie
+# for Flask's original signed-cookie sessions.
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "sqlite")
+if SESSION_BACKEND != "cookie":
+    from session_store import MemorySessionStore, ServerSideSessionInterface, SQLiteSessionStore
+
+    if SESSION_BACKEND == "memory":
+        session_store = MemorySessionStore(max_sessions=int(os.environ.get("SESSION_MAX_ENTRIES", 10000)))
+    else:
+        session_store = SQLiteSessionStore(os.environ.get(
+            "SESSION_PATH",
+            os.path.join(tempfile.gettempdir(), "bits_insights_sessions.sqlite3"),
+        ))
+    app.session_interface = ServerSideSessionInterface(session_store)
+
+# Session lists hold arXiv IDs only, newest first
+MAX_HISTORY = 10
+MAX_FAVORITES = 50
+
+
+def _session_ids(key: str) -> list:
+    # Older cookie sessions stored {"arxiv_id", "title"} dicts
+    return [e["arxiv_id"] if isinstance(e, dict) else e for e in session.get(key, [])]
+
+# Search results are shared across workers and restarts through SQLite.
+# Each route picks how long its results stay fresh.
+SEARCH_CACHE_TTL = float(os.environ.get("SEARCH_CACHE_TTL", 600))
+BROWSE_CACHE_TTL = float(os.environ.get("BROWSE_CACHE_TTL", 300))
+
+# Results requested from arXiv (and shown) per form search
+SEARCH_MAX_RESULTS = 40
+
+# SEARCH_STREAMING=1 streams /search by default (?stream=0/1 overrides per request)
+SEARCH_STREAMING = os.environ.get("SEARCH_STREAMING", "0") == "1"
+
+query_cache = QueryCache(
+    path=os.environ.get(
+        "QUERY_CACHE_PATH",
+        os.path.join(tempfile.gettempdir(), "bits_insights_query_cache.sqlite3"),
+    ),
+    max_entries=int(os.environ.get("QUERY_CACHE_MAX_ENTRIES", 5000)),
+)
+
+# Every arXiv request goes through one gateway: a token bucket shared by all
+# workers through UPSTREAM_LIMIT_PATH (arXiv asks for one request per 3 s),
+# adaptive backoff, pooled keep-alive connections and a circuit breaker.
+# While arXiv is failing, expired cached results are served and marked stale.
+upstream = gateway.UpstreamGateway(
+    bucket=gateway.TokenBucket(
+        rate=float(os.environ.get("UPSTREAM_RATE", gateway.DEFAULT_RATE)),
+        capacity=float(os.environ.get("UPSTREAM_BURST", 1)),
+        path=os.environ.get(
+            "UPSTREAM_LIMIT_PATH",
+            os.path.join(tempfile.gettempdir(), "bits_insights_upstream.bucket"),
+        ) or None,
+    ),
+    breaker=gateway.CircuitBreaker(
+        failure_threshold=int(os.environ.get("UPSTREAM_BREAKER_FAILURES", 5)),
+        reset_timeout=float(os.environ.get("UPSTREAM_BREAKER_RESET", 30)),
+    ),
+    pool_size=int(os.environ.get("UPSTREAM_POOL_SIZE", 10)),
+    timeout=float(os.environ.get("UPSTREAM_TIMEOUT", 15)),
+    max_wait=float(os.environ.get("UPSTREAM_MAX_WAIT", 10)),
+)
+gateway.set_default_gateway(upstream)
+gateway.register_metrics(upstream)
+
+strategy_options = dict(
+    cache_size=int(os.environ.get("PAPER_CACHE_SIZE", 1024)),
+    cache_ttl=float(os.environ.get("PAPER_CACHE_TTL", 3600)),
+    cache_stale_ttl=float(os.environ.get("PAPER_CACHE_STALE_TTL", 86400)),
+    query_cache=query_cache,
+    gateway=upstream,
+)
+
+# SEARCH_BACKEND=local answers relevance searches from a local full-text index
+# of papers we have already fetched when it holds a full page indexed within
+# LOCAL_INDEX_MAX_AGE seconds; date-sorted listings and misses go to arXiv.
+if os.environ.get("SEARCH_BACKEND", "arxiv") == "local":
+    from local_index import LocalIndex, LocalIndexSearchStrategy
+
+    strategy = LocalIndexSearchStrategy(
+        index=LocalIndex(os.environ.get(
+            "LOCAL_INDEX_PATH",
+            os.path.join(tempfile.gettempdir(), "bits_insights_index.sqlite3"),
+        )),
+        min_hits=int(os.environ.get("LOCAL_INDEX_MIN_HITS", 1)),
+        max_age=float(os.environ.get("LOCAL_INDEX_MAX_AGE", 3600)),
+        **strategy_options,
+    )
+else:
+    strategy = ArxivSearchStrategy(**strategy_options)
+
+# Similar papers on /paper come from a MinHash index over every paper the
+# strategy has seen (searches, lookups, harvests); SIMILAR_INDEX_SIZE=0 disables it.
+SIMILAR_INDEX_SIZE = int(os.environ.get("SIMILAR_INDEX_SIZE", 20000))
+SIMILAR_PAPERS_SHOWN = 5
+if SIMILAR_INDEX_SIZE > 0:
+    from similar import SimilarityIndex
+
+    strategy.similar = SimilarityIndex(max_papers=SIMILAR_INDEX_SIZE)
+
+# Author pages and full-name author searches are answered from an in-memory
+# author index over every paper the strategy sees; each author is fetched
+# once, then refreshed every AUTHOR_REFRESH_INTERVAL seconds with only their
+# newer papers. AUTHOR_INDEX_SIZE=0 disables it.
+AUTHOR_INDEX_SIZE = int(os.environ.get("AUTHOR_INDEX_SIZE", 20000))
+AUTHOR_PAPERS_SHOWN = 200
+if AUTHOR_INDEX_SIZE > 0:
+    from author_index import AuthorIndex
+
+    strategy.authors = AuthorIndex(
+        max_papers=AUTHOR_INDEX_SIZE,
+        refresh_interval=float(os.environ.get("AUTHOR_REFRESH_INTERVAL", 3600)),
+    )
+
+# PAPER_STORE_PATH points at a columnar store built offline by ingest.py from
+# arXiv's bulk metadata; paper lookups are answered from it (memory-mapped,
+# shared by workers) before arXiv is asked. For PAPER_STORE_TTL seconds after
+# its metadata was fetched its papers count as fresh; after that, papers
+# served from it are refreshed from arXiv in the background.
+if os.environ.get("PAPER_STORE_PATH"):
+    from paper_store import PaperStore
+
+    strategy.store = PaperStore.open(os.environ["PAPER_STORE_PATH"])
+    strategy.store_ttl = float(os.environ.get("PAPER_STORE_TTL", 86400))
+
+# CACHE_SNAPSHOT_PATH saves the paper and query caches to a memory-mapped
+# file every CACHE_SNAPSHOT_INTERVAL seconds and at exit; new processes
+# start from it instead of an empty cache.
+snapshotter = None
+if os.environ.get("CACHE_SNAPSHOT_PATH"):
+    from snapshot import Snapshotter
+
+    snapshotter = Snapshotter(
+        os.environ["CACHE_SNAPSHOT_PATH"],
+        strategy,
+        query_cache=query_cache,
+        interval=float(os.environ.get("CACHE_SNAPSHOT_INTERVAL", 300)),
+    )
+    snapshotter.restore()
+    snapshotter.start()
+    atexit.register(snapshotter.save)
+
+# Combined searches for /search/all run on asyncio and share the query cache.
+# Created on first use: httpx and feedparser are only needed by that route.
+_async_strategy = None
+
+
+def get_async_strategy():
+    global _async_strategy
+    if _async_strategy is None:
+        from async_strategy import AsyncArxivSearchStrategy
+
+        _async_strategy = AsyncArxivSearchStrategy(
+            query_cache=query_cache, cache_ttl=SEARCH_CACHE_TTL, gateway=upstream,
+        )
+    return _async_strategy
+
+
+# Categories offered on /browse
+BROWSE_CATEGORIES = [
+    ("cs.AI", "AI"),
+    ("cs.LG", "Machine Learning"),
+    ("cs.CL", "Computation & Language"),
+    ("cs.CV", "Computer Vision"),
+    ("math.PR", "Probability"),
+]
+BROWSE_DAY_OPTIONS = [7, 30, 90]
+# Papers per /browse page; the whole window is fetched (up to the strategy's
+# MAX_WINDOW_RESULTS) and paged locally
+BROWSE_PAGE_SIZE = int(os.environ.get("BROWSE_PAGE_SIZE", 30))
+
+# HARVESTER_ENABLED=1 keeps a rolling window of recent papers for the /browse
+# categories (plus any in HARVEST_CATEGORIES) in memory, so /browse needs no
+# upstream call once a category has been filled.
+harvester = None
+if os.environ.get("HARVESTER_ENABLED") == "1":
+    from harvester import CategoryHarvester
+
+    extra_categories = [c.strip() for c in os.environ.get("HARVEST_CATEGORIES", "").split(",") if c.strip()]
+    harvester = CategoryHarvester(
+        strategy,
+        categories=[value for value, _ in BROWSE_CATEGORIES] + extra_categories,
+        window_days=max(BROWSE_DAY_OPTIONS),
+        poll_interval=float(os.environ.get("HARVEST_INTERVAL", 900)),
+        max_per_poll=int(os.environ.get("HARVEST_MAX_PER_POLL", 2000)),
+    )
+    harvester.start()
+
+#Metrics
+# Prometheus text at /metrics; METRICS_SERVER_TIMING=1 also adds a
+# Server-Timing header (upstream, search, rank, render) to every response.
+METRICS_SERVER_TIMING = os.environ.get("METRICS_SERVER_TIMING", "0") == "1"
+
+
+def _cache_gauge(stat: str):
+    def collect():
+        caches = {"query": query_cache.stats(), "paper": strategy.paper_cache.stats()}
+        if fragments is not None:
+            caches["fragment"] = fragments.stats()
+        return {(("cache", name),): stats[stat] for name, stats in caches.items()}
+    return collect
+
+
+for _stat in ("size", "hits", "misses", "hit_ratio"):
+    metrics.REGISTRY.gauge(f"bits_cache_{_stat}", f"Cache {_stat.replace('_', ' ')} per cache", _cache_gauge(_stat))
+metrics.REGISTRY.gauge(
+    "bits_singleflight_calls", "Coalesced upstream calls (executed, deduplicated, in_flight)",
+    lambda: {(("stat", k),): v for k, v in strategy.inflight.stats().items()},
+)
+
+
+def _route() -> str:
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+    metrics.begin_request()
+
+
+@app.after_request
+def record_request(response):
+    start = g.get("request_start")
+    if start is not None:
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, route=_route())
+    if metrics.served_stale():
+        # Part of the page came from expired cache entries while arXiv was unavailable
+        response.headers["Warning"] = '110 - "Response is Stale"'
+        response.cache_control.public = False
+        response.cache_control.max_age = None
+        response.cache_control.no_store = True
+    if METRICS_SERVER_TIMING:
+        timings = metrics.request_timings()
+        if timings:
+            response.headers["Server-Timing"] = metrics.server_timing_header(timings)
+    return response
+
+
+@app.errorhandler(gateway.UpstreamUnavailable)
+def upstream_unavailable(error):
+    # Circuit open (or rate limit queue full) and nothing cached to fall back on
+    retry_after = int(upstream.breaker.reset_timeout)
+    return "arXiv is temporarily unavailable, please try again shortly.", 503, {"Retry-After": str(retry_after)}
+
+
+@app.context_processor
+def upstream_status():
+    # A function, so a streamed page can ask after its results are in (the
+    # notice comes after the result loop there); its headers are already sent
+    # by then, so streamed pages are always no-store (see search())
+    return {"served_stale": metrics.served_stale}
+
+
+@before_render_template.connect_via(app)
+def start_render_timer(sender, template, context, **extra):
+    g.render_start = time.perf_counter()
+
+
+@template_rendered.connect_via(app)
+def record_render(sender, template, context, **extra):
+    start = g.pop("render_start", None)
+    if start is not None:
+        metrics.record_phase("render", time.perf_counter() - start, route=_route())
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.REGISTRY.expose(), mimetype="text/plain; version=0.0.4")
+
+#HTTP caching
+# Max age for shared caches (browsers, reverse proxy, CDN) of /paper and /browse
+PAGE_CACHE_MAX_AGE = int(os.environ.get("PAGE_CACHE_MAX_AGE", 300))
+
+# Rendered /search, /browse, /paper and /author pages are kept per process,
+# compressed once with gzip (and brotli when installed) and sent to clients
+# as is, so a page whose papers haven't changed is neither re-rendered nor
+# re-compressed. FRAGMENT_CACHE_BYTES bounds the compressed size (0 disables it).
+FRAGMENT_CACHE_BYTES = int(os.environ.get("FRAGMENT_CACHE_BYTES", 32 << 20))
+fragments = FragmentCache(max_bytes=FRAGMENT_CACHE_BYTES) if FRAGMENT_CACHE_BYTES > 0 else None
+
+
+@functools.lru_cache(maxsize=None)
+def _template_version(name: str) -> str:
+    # Part of every ETag, so a deploy that changes the template invalidates it
+    source, _, _ = app.jinja_env.loader.get_source(app.jinja_env, name)
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+
+
+def _rendered(key: str, render, template: str) -> Response:
+    """
+    A rendered page from the fragment cache, in the best encoding the client
+    accepts. key must identify everything the page shows. Pages built from
+    stale data are rendered as usual and not cached.
+    """
+    if fragments is None or metrics.served_stale():
+        return make_response(render())
+    fragment = fragments.get_or_render(
+        f"{_template_version(template)}:{key}", render, store=lambda: not metrics.served_stale(),
+    )
+    encoding = request.accept_encodings.best_match(fragment.encodings()) or "identity"
+    response = Response(fragment.body(encoding), mimetype="text/html")
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def _cacheable(key: str, render, template: str, last_modified: Optional[datetime] = None,
+               max_age: Optional[int] = None):
+    """
+    Answer with 304 when the client's ETag / Last-Modified validators still
+    match, otherwise render. key must identify everything the page shows;
+    the page must not read the session (which would add Vary: Cookie).
+    """
+    etag = hashlib.sha1(f"{_template_version(template)}:{key}".encode("utf-8")).hexdigest()
+    if last_modified is not None:
+        # HTTP dates have one-second resolution
+        last_modified = last_modified.replace(microsecond=0)
+
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = _rendered(key, render, template)
+    else:
+        response = Response()
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = PAGE_CACHE_MAX_AGE if max_age is None else max_age
+    response.vary.add("Accept-Encoding")
+    return response.make_conditional(request)
+
 
 @app.route("/")
 def home():
-    history = session.get("reading_history", [])
+    # Titles come from the paper cache rather than the session
+    history = [
+        {"arxiv_id": paper_id, "title": getattr(strategy.paper_cache.peek(normalize_arxiv_id(paper_id)), "title", "")}
+        for paper_id in _session_ids("reading_history")
+    ]
     return render_template("index.html", history=history)
 
 
+def _choose_search(query: str, author: str, category: str):
+    """Pick the strategy call for a form search. Returns a lazy iterator."""
+    # Priority example:
+    #  (author + category) > author > (category only) > keywords
+
+    if author and category:
+        # Author + Category
+        return strategy.search_author_in_category(
+            author=author,
+            category=category,
+            max_results=SEARCH_MAX_RESULTS,
+            cache_ttl=SEARCH_CACHE_TTL,
+        )
+    elif author:
+        # Author only
+        return strategy.search_by_author(
+            author_name=author,
+            max_results=SEARCH_MAX_RESULTS,
+            cache_ttl=SEARCH_CACHE_TTL,
+        )
+    elif category and not query:
+        # Category only, no keywords
+        return strategy.search_by_category(
+            category=category,
+            max_results=SEARCH_MAX_RESULTS,
+            cache_ttl=SEARCH_CACHE_TTL,
+        )
+    elif category:
+        # Keywords with additional category filtering
+        return strategy.complex_query(
+            query=f"({query}) AND cat:{category}",
+            max_results=SEARCH_MAX_RESULTS,
+            cache_ttl=SEARCH_CACHE_TTL,
+        )
+    else:
+        # Pure keyword search
+        return strategy.search_by_keywords(
+            keywords=query or "all",
+            max_results=SEARCH_MAX_RESULTS,
+            cache_ttl=SEARCH_CACHE_TTL,
+        )
+
+
+def _stream_search(query: str, author: str, category: str):
+    """
+    Yield (score, paper) pairs for the streamed results page.
+    The upstream call happens on the first next(), i.e. after the page
+    header has been sent. Errors end the list instead of breaking a
+    response that is already half written.
+    """
+    query_terms = query.split()
+    try:
+        for result in _choose_search(query, author, category):
+            yield (strategy.scorer.score(result, query_terms) if query else 0.0), result
+    except Exception:
+        app.logger.exception("Streamed search failed for %r", query)
+
+
 @app.route("/search")
 def search():
-    query = request.args.get("query", "").strip()
-    author = request.args.get("author", "").strip()
+    # Normalized, so spacing variants share one cached page
+    query = " ".join(request.args.get("query", "").split())
+    author = " ".join(request.args.get("author", "").split())
     category = request.args.get("category", "").strip()
 
     # If no search parameters, return empty results
@@ -32,83 +447,76 @@ def search():
             category="",
         )
 
+    # Streamed page: header first, then each card, then a final reorder by score
+    if request.args.get("stream", "1" if SEARCH_STREAMING else "0") == "1":
+        response = Response(stream_template(
+            "search_results.html",
+            papers=_stream_search(query, author, category),
+            streaming=True,
+            query=query,
+            author=author,
+            category=category,
+        ))
+        # Headers go out before the results, so whether any are stale isn't known yet
+        response.cache_control.no_store = True
+        return response
+
     # -------- 1. Choose which search strategy to use --------
-    # Priority example:
-    #  (author + category) > author > (category only) > keywords
+    with metrics.phase("search", route="/search"):
+        results_iter = _choose_search(query, author, category)
 
-    if author and category:
-        # Author + Category
-        results_iter = strategy.search_author_in_category(
+    # -------- 2. Optional: Custom scoring / ranking based on query --------
+    # If the user entered keywords, use your rank_by_relevance_score to re-rank
+    with metrics.phase("rank", route="/search"):
+        if query:
+            # Bounded top-k over the results as they are pulled
+            ranked = list(strategy.pipeline(results_iter).top(SEARCH_MAX_RESULTS, query.split(), with_scores=True))
+            results_list = [r for score, r in ranked if score > 0] or [r for score, r in ranked]
+        else:
+            # No keywords (e.g., pure author/category search), keep original order
+            results_list = list(results_iter)
+
+    # PaperRecords carry everything the template needs
+    papers = results_list
+
+    # The results shown (in order, with versions) are the page's data version
+    return _rendered(
+        f"search-{(query, author, category)!r}-{','.join(p.short_id for p in papers)}",
+        lambda: render_template(
+            "search_results.html",
+            papers=papers,
+            query=query,
             author=author,
             category=category,
-            max_results=40,
-        )
-    elif author:
-        # Author only
-        results_iter = strategy.search_by_author(
-            author_name=author,
-            max_results=40,
-        )
-    elif category and not query:
-        # Category only, no keywords
-        results_iter = strategy.search_by_category(
+        ),
+        template="search_results.html",
+    )
+
+
+@app.route("/search/all")
+async def search_all():
+    """
+    Combined search: keyword, title and author variants of the form query
+    are OR-ed into one arXiv query, instead of picking one.
+    """
+    query = request.args.get("query", "").strip()
+    author = request.args.get("author", "").strip()
+    category = request.args.get("category", "").strip()
+
+    with metrics.phase("search", route="/search/all"):
+        results_list = await get_async_strategy().search_combined(
+            keywords=query,
+            author=author,
             category=category,
-            max_results=40,
+            max_results=SEARCH_MAX_RESULTS,
         )
-    else:
-        # Keywords (can have additional category filtering)
-        if category:
-            complex_q = f"({query}) AND cat:{category}" if query else f"cat:{category}"
-            results_iter = strategy.complex_query(
-                query=complex_q,
-                max_results=40,
-            )
-        else:
-            # Pure keyword search
-            results_iter = strategy.search_by_keywords(
-                keywords=query or "all",
-                max_results=40,
-            )
 
-    # -------- 2. Optional: Custom scoring / ranking based on query --------
-    # If the user entered keywords, use your rank_by_relevance_score to re-rank
     if query:
-        ranked = strategy.rank_by_relevance_score(
-            results_iter,
-            query_terms=query.split(),
-        )
-        results_list = [r for score, r in ranked if score > 0] or [r for score, r in ranked]
-    else:
-        # No keywords (e.g., pure author/category search), keep original order
-        results_list = list(results_iter)
-
-    # -------- 3. Convert arxiv.Result to dict needed by template --------
-    papers = []
-    for r in results_list:
-        # r.entry_id similar to "http://arxiv.org/abs/2401.12345v1"
-        arxiv_id = r.entry_id.split("/")[-1]
-
-        # published might be datetime or None
-        if getattr(r, "published", None):
-            published_str = r.published.strftime("%Y-%m-%d")
-        else:
-            published_str = ""
+        with metrics.phase("rank", route="/search/all"):
+            ranked = strategy.rank_by_relevance_score(results_list, query_terms=query.split())
+            results_list = [r for score, r in ranked if score > 0] or [r for score, r in ranked]
 
-        authors = []
-        try:
-            authors = [a.name for a in r.authors]
-        except Exception:
-            authors = []
-
-        papers.append({
-            "title": r.title,
-            "summary": r.summary,
-            "authors": authors,
-            "html_link": r.entry_id,
-            "pdf_link": getattr(r, "pdf_url", None),
-            "published": published_str,
-            "arxiv_id": arxiv_id,
-        })
+    papers = results_list
 
     return render_template(
         "search_results.html",
@@ -128,87 +536,73 @@ def paper_detail(arxiv_id):
         # If not found, render a simple not found page
         return render_template("paper_detail.html", paper=None, arxiv_id=arxiv_id)
 
-    # ===== Convert arxiv.Result to dict for template =====
-    # arxiv_id: some libraries use result.get_short_id(), or you can use the passed-in value
+    # arxiv_id: keep the passed-in value for links and history
     paper_id = arxiv_id
+    paper = result
+
+    # The page doesn't depend on the session: reading history is recorded by
+    # the beacon below and favorites come from Firestore, so anonymous and
+    # logged-in visitors share one cacheable response per paper version.
+    similar = strategy.similar.similar(paper.arxiv_id, k=SIMILAR_PAPERS_SHOWN) if strategy.similar else []
+    similar_ids = ",".join(p.short_id for _, p in similar)
+
+    updated = paper.updated or paper.published
+    return _cacheable(
+        f"paper-{paper_id}-v{paper.version}-{updated.timestamp() if updated else ''}-{similar_ids}",
+        lambda: render_template("paper_detail.html", paper=paper, arxiv_id=paper_id, similar=similar),
+        template="paper_detail.html",
+        last_modified=updated,
+    )
 
-    # Published date
-    if getattr(result, "published", None):
-        published_str = result.published.strftime("%Y-%m-%d")
-    else:
-        published_str = ""
-
-    # Authors list
-    try:
-        authors = [a.name for a in result.authors]
-    except Exception:
-        authors = []
-
-    # Primary category (might be missing)
-    primary_category = getattr(result, "primary_category", "")
-
-    paper = {
-        "arxiv_id": paper_id,
-        "title": result.title,
-        "summary": result.summary,
-        "authors": authors,
-        "published": published_str,
-        "html_link": result.entry_id,          # Detail page link
-        "pdf_link": getattr(result, "pdf_url", None),
-        "primary_category": primary_category,
-    }
-
-    # ====== Continue to keep your previous reading_history logic (stored in session)======
-    history = session.get("reading_history", [])
-
-    # Remove duplicates: if the same paper was viewed, delete the old one
-    history = [h for h in history if h["arxiv_id"] != paper_id]
-
-    # Insert at the front
-    history.insert(0, {
-        "arxiv_id": paper_id,
-        "title": result.title,
-    })
-
-    # Keep at most 10 entries
-    history = history[:10]
-    session["reading_history"] = history
-    # ====================================================
-
-    # This is the old session-based favorites feature. If you have switched to Firebase favorites, the frontend might not use this anymore,
-    # but it's harmless to keep it. Pass an is_favorite to the template for compatibility with the old template.
-    favorites = session.get("favorites", [])
-    is_favorite = any(f["arxiv_id"] == paper_id for f in favorites)
 
-    return render_template(
-        "paper_detail.html",
-        paper=paper,
-        arxiv_id=paper_id,
-        is_favorite=is_favorite,
+@app.route("/author/<path:name>")
+def author_page(name):
+    """Publication list, category breakdown and frequent co-authors of one author."""
+    key = author_key(name)
+    if strategy.authors is None or key is None:
+        # Bare family names match too many people for a profile
+        return redirect(url_for("search", author=name))
+
+    strategy.author_papers(name)
+    profile = strategy.authors.profile(key)
+    if profile is None:
+        return render_template("author.html", profile=None, name=name), 404
+
+    watermark = profile.watermark
+    return _cacheable(
+        f"author-{key}-{len(profile.papers)}-{profile.papers[0].short_id}-{watermark.timestamp() if watermark else ''}",
+        lambda: render_template("author.html", profile=profile, papers=profile.papers[:AUTHOR_PAPERS_SHOWN]),
+        template="author.html",
+        last_modified=watermark,
     )
 
 
+@app.route("/history/<arxiv_id>", methods=["POST"])
+def record_view(arxiv_id):
+    """Beacon sent by the paper page to add it to the session reading history."""
+    result = strategy.get_paper_by_id(arxiv_id)
+    if result is None:
+        return "", 404
+
+    # Move to the front (dropping the earlier visit) and keep MAX_HISTORY
+    history = dict.fromkeys([arxiv_id, *_session_ids("reading_history")])
+    session["reading_history"] = list(history)[:MAX_HISTORY]
+    return "", 204
+
+
 @app.route("/toggle_favorite/<arxiv_id>", methods=["POST"])
 def toggle_favorite(arxiv_id):
-    title = request.form.get("title", "")
-    favorites = session.get("favorites", [])
-
-    # Check if it's already in favorites
-    exists = any(f["arxiv_id"] == arxiv_id for f in favorites)
+    # Ordered dict of IDs: O(1) membership, insertion order = newest first
+    favorites = dict.fromkeys(_session_ids("favorites"))
 
-    if exists:
+    if arxiv_id in favorites:
         # If already favorited, remove it
-        favorites = [f for f in favorites if f["arxiv_id"] != arxiv_id]
+        del favorites[arxiv_id]
     else:
-        # If not favorited, add to the front
-        favorites.insert(0, {
-            "arxiv_id": arxiv_id,
-            "title": title,
-        })
-        # Keep at most 50 entries
-        favorites = favorites[:50]
+        # If not favorited, add to the front and keep MAX_FAVORITES
+        favorites = dict.fromkeys([arxiv_id, *favorites])
 
-    session["favorites"] = favorites
+    session["favorites"] = list(favorites)[:MAX_FAVORITES]
 
     # After operation, return to the paper detail page
     return redirect(url_for("paper_detail", arxiv_id=arxiv_id))
@@ -237,56 +631,240 @@ def browse():
     #   Here we use search_recent_papers + arxiv's query syntax
     query = f"cat:{category}"
 
-    results_iter = strategy.search_recent_papers(
-        keywords=query,
-        days=days,
-        max_results=30,
-    )
+    try:
+        page = max(1, int(request.args.get("page", "1")))
+    except ValueError:
+        page = 1
+
+    # The whole window, newest first: from the harvester's in-memory window
+    # when it covers this category, else one date-range query sized to it
+    window_papers = harvester.recent(category, days, limit=strategy.MAX_WINDOW_RESULTS) if harvester else None
+    if window_papers is None:
+        window_papers = list(strategy.search_recent_papers(
+            keywords=query,
+            days=days,
+            max_results=None,
+            cache_ttl=BROWSE_CACHE_TTL,
+        ))
+
+    # 3. PaperRecords go straight to the template
+    total = len(window_papers)
+    pages = max(1, -(-total // BROWSE_PAGE_SIZE))
+    page = min(page, pages)
+    papers = window_papers[(page - 1) * BROWSE_PAGE_SIZE:page * BROWSE_PAGE_SIZE]
+
+    # The window's high-water mark and paper versions identify the page
+    high_water = harvester.high_water_mark(category) if harvester else None
+    newest = max((p.published for p in papers if p.published), default=None)
+    window = ",".join(p.short_id for p in papers)
 
-    # 3. Convert arxiv.Result to dict for template
-    papers = []
-    for r in results_iter:
-        arxiv_id = r.entry_id.split("/")[-1]
+    # 4. Some common categories for dropdown
+    return _cacheable(
+        f"browse-{category}-{days}-{page}/{pages}/{total}-{high_water.timestamp() if high_water else ''}-{window}",
+        lambda: render_template(
+            "browse.html",
+            papers=papers,
+            current_category=category,
+            current_days=days,
+            page=page,
+            pages=pages,
+            total=total,
+            categories=BROWSE_CATEGORIES,
+            day_options=BROWSE_DAY_OPTIONS,
+        ),
+        template="browse.html",
+        last_modified=newest,
+        max_age=min(PAGE_CACHE_MAX_AGE, BROWSE_CACHE_TTL),
+    )
 
-        if getattr(r, "published", None):
-            published_str = r.published.strftime("%Y-%m-%d")
-        else:
-            published_str = ""
+# Max IDs accepted by /api/papers in one request
+API_MAX_IDS = 100
+
+
+@app.route("/api/papers")
+def api_papers():
+    """
+    Batched metadata lookup: /api/papers?ids=2401.12345,2312.00001
+    Used to enrich favorites and recently viewed lists in one request.
+    """
+    ids = [i.strip() for i in request.args.get("ids", "").split(",") if i.strip()]
+    if not ids:
+        return jsonify({"papers": [], "missing": []})
+    if len(ids) > API_MAX_IDS:
+        return jsonify({"error": f"At most {API_MAX_IDS} ids per request"}), 400
+
+    # Malformed IDs are never looked up; they are reported missing
+    ids = list(dict.fromkeys(normalize_arxiv_id(i) for i in ids))
+    found = strategy.get_papers_by_ids([i for i in ids if is_arxiv_id(i)])
+
+    papers = [record.to_dict() for record in found.values()]
+    missing = [i for i in ids if i not in found]
+    return jsonify({"papers": papers, "missing": missing})
+
+
+#Suggestions
+# /api/suggest?q= completes titles, author names and category codes from an
+# in-memory prefix index over every paper the strategy has seen; it never
+# calls arXiv. SUGGEST_INDEX_SIZE caps the suggestions kept (0 disables it).
+SUGGEST_INDEX_SIZE = int(os.environ.get("SUGGEST_INDEX_SIZE", 100000))
+SUGGEST_MAX_RESULTS = 10
+if SUGGEST_INDEX_SIZE > 0:
+    from suggest import CATEGORY, KINDS, SuggestIndex
+
+    strategy.suggestions = SuggestIndex(max_terms=SUGGEST_INDEX_SIZE)
+    strategy.suggestions.add_terms(CATEGORY, [value for value, _ in BROWSE_CATEGORIES])
+    if strategy.store is not None:
+        strategy.suggestions.add_terms(CATEGORY, strategy.store.categories)
+
+
+@app.route("/api/suggest")
+def api_suggest():
+    """
+    Typeahead: /api/suggest?q=graph neu&kind=title,author&limit=8
+    Returns [{"kind", "text", "count"}], most used first.
+    """
+    query = request.args.get("q", "")
+    if strategy.suggestions is None or not query.strip():
+        return jsonify({"query": query, "suggestions": []})
+    kinds = [k for k in request.args.get("kind", "").split(",") if k] or KINDS
+    limit = max(1, min(request.args.get("limit", 8, type=int), SUGGEST_MAX_RESULTS))
+    suggestions = strategy.suggestions.suggest(query, k=limit, kinds=kinds)
+
+    response = jsonify({"query": query, "suggestions": [s.to_dict() for s in suggestions]})
+    # Suggestions shift as papers are seen; a short private cache absorbs repeated keystrokes
+    response.headers["Cache-Control"] = "private, max-age=60"
+    return response
+
+
+#Export
+# /api/export streams up to EXPORT_MAX_RESULTS papers per request as JSONL or
+# CSV. Every export pages through arXiv at its 3 second request interval, so
+# only EXPORT_MAX_CONCURRENT run at a time per worker; others get 429.
+EXPORT_MAX_RESULTS = int(os.environ.get("EXPORT_MAX_RESULTS", 10000))
+EXPORT_PAGE_SIZE = int(os.environ.get("EXPORT_PAGE_SIZE", 500))
+_export_slots = threading.BoundedSemaphore(int(os.environ.get("EXPORT_MAX_CONCURRENT", 1)))
+
+EXPORT_FORMATS = {
+    "jsonl": ("application/x-ndjson", export.jsonl_rows),
+    "csv": ("text/csv", export.csv_rows),
+}
+EXPORT_SORTS = {
+    "relevance": arxiv.SortCriterion.Relevance,
+    "submitted": arxiv.SortCriterion.SubmittedDate,
+    "updated": arxiv.SortCriterion.LastUpdatedDate,
+}
+
+
+def _export_cursor(args) -> PageCursor:
+    """Cursor for a new export from the form-style query string (raises ValueError)."""
+    clauses = []
+    if args.get("query", "").strip():
+        clauses.append(f"({args['query'].strip()})")
+    if args.get("author", "").strip():
+        clauses.append(f"au:{args['author'].strip()}")
+    if args.get("category", "").strip():
+        clauses.append(f"cat:{args['category'].strip()}")
+    start = datetime.strptime(args["from"], "%Y-%m-%d") if args.get("from") else None
+    end = datetime.strptime(args["to"], "%Y-%m-%d").replace(hour=23, minute=59) if args.get("to") else None
+    keywords = [k for k in args.get("abstract", "").split(",") if k.strip()]
+
+    query = plan_query(" AND ".join(clauses), start, end, keywords)
+    if not query:
+        raise ValueError("Give at least one of query, author, category")
+    if args.get("sort", "relevance") not in EXPORT_SORTS:
+        raise ValueError(f"sort must be one of {', '.join(EXPORT_SORTS)}")
+    limit = int(args.get("limit", EXPORT_MAX_RESULTS))
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return PageCursor(
+        query=query,
+        page_size=EXPORT_PAGE_SIZE,
+        total_results=min(limit, EXPORT_MAX_RESULTS),
+        sort_by=EXPORT_SORTS[args.get("sort", "relevance")].value,
+    )
 
-        try:
-            authors = [a.name for a in r.authors]
-        except Exception:
-            authors = []
-
-        papers.append({
-            "title": r.title,
-            "summary": r.summary,
-            "authors": authors,
-            "html_link": r.entry_id,
-            "pdf_link": getattr(r, "pdf_url", None),
-            "published": published_str,
-            "arxiv_id": arxiv_id,
-        })
 
-    # 4. Some common categories for dropdown
-    categories = [
-        ("cs.AI", "AI"),
-        ("cs.LG", "Machine Learning"),
-        ("cs.CL", "Computation & Language"),
-        ("cs.CV", "Computer Vision"),
-        ("math.PR", "Probability"),
-    ]
+@app.route("/api/export")
+def api_export():
+    """
+    Bulk export: /api/export?query=...&author=...&category=...&from=YYYY-MM-DD
+    &to=YYYY-MM-DD&abstract=kw1,kw2&sort=relevance|submitted|updated&limit=N
+    &format=jsonl|csv
+
+    Papers are streamed as they arrive from arXiv, page by page, in constant
+    memory; the body is gzip-compressed when the client accepts it (?gzip=0
+    turns that off). The X-Export-Cursor header identifies the export: if it
+    is interrupted, ?cursor=<token>&received=<rows saved> continues after
+    the last row received. If arXiv fails part way, the body ends with an
+    error row carrying that query string and the connection is dropped
+    before the final chunk, so a truncated export never looks complete.
+    """
+    fmt = request.args.get("format", "jsonl")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    mimetype, serialize = EXPORT_FORMATS[fmt]
 
-    day_options = [7, 30, 90]
+    try:
+        if request.args.get("cursor"):
+            cursor = PageCursor.decode(request.args["cursor"])
+            cursor.page_size = min(cursor.page_size, EXPORT_PAGE_SIZE)
+            cursor.total_results = min(cursor.total_results, EXPORT_MAX_RESULTS)
+        else:
+            cursor = _export_cursor(request.args)
+        received = int(request.args.get("received", 0))
+    except (ValueError, TypeError, KeyError):
+        return jsonify({"error": "Invalid export parameters"}), 400
+    if received < 0:
+        return jsonify({"error": "received must not be negative"}), 400
+
+    token = cursor.encode()
+    start = cursor.offset
+    cursor.offset += received
+    if not _export_slots.acquire(blocking=False):
+        response = jsonify({"error": "Too many exports in progress, try again shortly"})
+        response.status_code = 429
+        response.headers["Retry-After"] = "30"
+        return response
+
+    stream = strategy.paginated_search(cursor.query, cursor=cursor)
+    failures = []
+
+    def guarded(rows):
+        # A failure ends the rows with an error row saying where to resume
+        try:
+            yield from rows
+        except Exception as err:
+            app.logger.exception("Export failed at offset %d for %r", cursor.offset, cursor.query)
+            failures.append(err)
+            resume = f"cursor={token}&received={cursor.offset - start}"
+            yield export.error_row(fmt, "arXiv request failed; export is incomplete", resume)
+
+    # The CSV header is only sent at the start of an export, not on resume
+    rows = serialize(stream, header=cursor.offset == 0) if fmt == "csv" else serialize(stream)
+
+    compress = request.args.get("gzip", "1") != "0" and "gzip" in request.accept_encodings
+
+    def body():
+        # Send what has been serialized at the end of every upstream page
+        chunks = export.chunked(guarded(rows), flush_after=lambda: cursor.offset % cursor.page_size == 0)
+        yield from export.gzip_chunks(chunks) if compress else chunks
+        if failures:
+            # The gzip stream and error row are complete; dropping the connection
+            # before the final chunk also makes the failure visible to HTTP clients
+            raise failures[0]
+
+    response = Response(body(), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename=arxiv-export.{fmt}"
+    response.headers["X-Export-Cursor"] = token
+    response.headers["Cache-Control"] = "no-store"
+    response.vary.add("Accept-Encoding")
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    # Runs however the response ends, including before the body was started
+    response.call_on_close(stream.close)
+    response.call_on_close(_export_slots.release)
+    return response
 
-    return render_template(
-        "browse.html",
-        papers=papers,
-        current_category=category,
-        current_days=days,
-        categories=categories,
-        day_options=day_options,
-    )
 
 @app.route("/forum")
 def forum():
@@ -0,0 +1,187 @@
+# async_strategy.py
+import asyncio
+import calendar
+import logging
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import arxiv
+import feedparser
+import httpx
+
+import metrics
+from gateway import UPSTREAM_ERRORS, UpstreamGateway
+from pagination import MIN_REQUEST_INTERVAL
+from paper_cache import normalize_arxiv_id
+from paper_record import PaperRecord
+from query_cache import QueryCache
+
+logger = logging.getLogger(__name__)
+
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+
+
+class AsyncRateLimiter:
+    """
+    Spaces out requests by min_interval seconds across every coroutine and
+    thread in the process. Slots are handed out under a plain lock, so one
+    limiter works across the separate event loops Flask creates for async views.
+    """
+
+    def __init__(self, min_interval: float = MIN_REQUEST_INTERVAL):
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    async def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+# Shared by every AsyncArxivSearchStrategy in the process
+GLOBAL_RATE_LIMITER = AsyncRateLimiter()
+
+
+def _to_datetime(struct: Optional[time.struct_time]) -> Optional[datetime]:
+    if struct is None:
+        return None
+    return datetime.fromtimestamp(calendar.timegm(struct), tz=timezone.utc)
+
+
+def parse_feed(content: bytes) -> List[PaperRecord]:
+    """Parse an arXiv Atom response straight into PaperRecords."""
+    feed = feedparser.parse(content)
+    records = []
+    for entry in feed.entries:
+        if "id" not in entry:
+            continue
+        short_id = entry.id.split("/abs/")[-1]
+        version = re.search(r"v(\d+)$", short_id)
+        primary = entry.get("arxiv_primary_category") or {}
+        records.append(PaperRecord(
+            arxiv_id=normalize_arxiv_id(short_id),
+            version=int(version.group(1)) if version else 1,
+            title=re.sub(r"\s+", " ", entry.get("title", "")).strip(),
+            summary=entry.get("summary", ""),
+            authors=tuple(sys.intern(a.get("name", "")) for a in entry.get("authors", [])),
+            published=_to_datetime(entry.get("published_parsed")),
+            updated=_to_datetime(entry.get("updated_parsed")),
+            primary_category=sys.intern(primary.get("term", "")),
+            categories=tuple(sys.intern(t["term"]) for t in entry.get("tags", []) if t.get("term")),
+        ))
+    return records
+
+
+class AsyncArxivSearchStrategy:
+    """
+    asyncio counterpart of ArxivSearchStrategy for combined searches.
+
+    The keyword, title and author variants of a form search are OR-ed into
+    one arXiv query, so a combined search costs a single upstream request
+    (arXiv's relevance ranking favours papers matching several of them).
+    Requests go through a process-wide rate limiter, so waiting for arXiv
+    costs no thread; with a gateway, its shared token bucket, backoff and
+    circuit breaker are used instead. With a query_cache, queries share
+    entries with the synchronous strategy's complex_query (including stale
+    fallbacks).
+    """
+
+    def __init__(self, query_cache: Optional[QueryCache] = None,
+                 rate_limiter: Optional[AsyncRateLimiter] = None,
+                 api_url: str = ARXIV_API_URL, timeout: float = 15.0, cache_ttl: Optional[float] = None,
+                 gateway: Optional[UpstreamGateway] = None):
+        self.query_cache = query_cache
+        self.rate_limiter = rate_limiter or GLOBAL_RATE_LIMITER
+        self.gateway = gateway
+        self.api_url = api_url
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+
+    async def search(self, client: httpx.AsyncClient, query: str, max_results: int = 10,
+                     sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance) -> List[PaperRecord]:
+        """One arXiv query, answered from the query cache when possible."""
+        key = QueryCache.make_key("complex_query", query, sort_by.value, max_results)
+        if self.query_cache is not None:
+            cached = self.query_cache.get(key)
+            if cached is not None:
+                return cached
+
+        try:
+            results = await self._fetch(client, query, max_results, sort_by)
+        except UPSTREAM_ERRORS + (httpx.HTTPError,) as err:
+            stale = self.query_cache.get_stale(key) if self.query_cache is not None else None
+            if stale is None:
+                raise
+            logger.warning("Query %r: arXiv unavailable (%s), serving stale results", query, err)
+            metrics.mark_stale("search_combined")
+            return stale
+
+        if self.query_cache is not None:
+            self.query_cache.set(key, results, ttl=self.cache_ttl)
+        return results
+
+    async def _fetch(self, client: httpx.AsyncClient, query: str, max_results: int,
+                     sort_by: arxiv.SortCriterion) -> List[PaperRecord]:
+        if self.gateway is None:
+            await self.rate_limiter.wait()
+        else:
+            await self.gateway.before_request_async()
+        start = time.perf_counter()
+        with metrics.upstream("search_combined"):
+            try:
+                resp = await client.get(self.api_url, params={
+                    "search_query": query,
+                    "start": 0,
+                    "max_results": max_results,
+                    "sortBy": sort_by.value,
+                    "sortOrder": arxiv.SortOrder.Descending.value,
+                })
+                resp.raise_for_status()
+            except httpx.HTTPError as err:
+                if self.gateway is not None:
+                    status = err.response.status_code if isinstance(err, httpx.HTTPStatusError) else 500
+                    if status >= 500 or status == 429:
+                        self.gateway.record_failure()
+                    else:
+                        self.gateway.record_success(time.perf_counter() - start)
+                raise
+            except BaseException:
+                # Cancelled mid-request: no outcome to record, but free the circuit's trial slot
+                if self.gateway is not None:
+                    self.gateway.cancel()
+                raise
+            if self.gateway is not None:
+                self.gateway.record_success(time.perf_counter() - start)
+            return parse_feed(resp.content)
+
+    async def search_combined(self, keywords: str = "", author: str = "", category: str = "",
+                              max_results: int = 40) -> List[PaperRecord]:
+        """
+        Search keywords in all fields and in titles, and author by name, as
+        one OR query (all:(...) OR ti:(...) OR au:"..."), restricted to
+        category when one is given.
+        """
+        terms = []
+        if keywords:
+            terms.append(f"all:({keywords})")
+            terms.append(f"ti:({keywords})")
+        if author:
+            terms.append(f'au:"{author}"')
+        if terms:
+            query = " OR ".join(terms)
+            if category:
+                query = f"({query}) AND cat:{category}"
+        elif category:
+            query = f"cat:{category}"
+        else:
+            return []
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            return await self.search(client, query, max_results)
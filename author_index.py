@@ -0,0 +1,222 @@
+# author_index.py
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from paper_record import PaperRecord
+
+# Name suffixes that are not the family name
+_SUFFIXES = frozenset({"jr", "sr", "ii", "iii", "iv"})
+
+
+def author_key(name: str) -> Optional[str]:
+    """
+    Normalized "family-name given-names" key, e.g. "José A. García-Pérez" and
+    "García-Pérez, José A." both give "garciaperez jose a". Given names are
+    kept in full, so "John Smith", "Jane Smith" and "J. Smith" stay apart.
+    Returns None for names without a given name.
+    """
+    if "," in name:
+        family, _, given = name.partition(",")
+        name = f"{given} {family}"
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").lower()
+    tokens = [t for t in re.sub(r"[^a-z\s.]", "", ascii_name).replace(".", " ").split() if t not in _SUFFIXES]
+    if len(tokens) < 2:
+        return None
+    return " ".join([tokens[-1]] + tokens[:-1])
+
+
+class AuthorProfile(NamedTuple):
+    key: str
+    name: str
+    papers: List[PaperRecord]             # newest first
+    categories: List[Tuple[str, int]]     # primary categories, most papers first
+    coauthors: List[Tuple[str, int]]      # display names, most shared papers first
+    watermark: Optional[datetime]         # newest submission fetched from arXiv for this author
+
+
+class AuthorIndex:
+    """
+    In-memory author index over every paper the strategy sees.
+
+    Author keys (see author_key) map to compact arrays of paper ordinals, so
+    an author's publication list, category breakdown and co-authors need no
+    arXiv query. Co-author counts are aggregated per author on first use and
+    then updated from the papers added since, never recounted.
+
+    arXiv matches author queries loosely ("G. Hinton" for "Geoffrey
+    Hinton"), so the papers fetched for a name are also linked to its key.
+    An author counts as complete once their papers have been fetched from
+    arXiv (refresh_interval seconds ago at most); later refreshes only ask
+    for papers submitted after the author's watermark. Beyond max_papers
+    the oldest papers are dropped (down to three quarters of it) and the
+    authors they belonged to are fetched again on their next lookup.
+    """
+
+    def __init__(self, max_papers: int = 20000, refresh_interval: float = 3600,
+                 max_authors_per_paper: int = 50):
+        self.max_papers = max_papers
+        self.refresh_interval = refresh_interval
+        # Large collaborations would swamp co-author counts; their papers are still listed
+        self.max_authors_per_paper = max_authors_per_paper
+
+        self._records: List[PaperRecord] = []
+        self._ordinals: Dict[str, int] = {}
+        self._postings: Dict[str, array] = {}
+        self._names: Dict[str, str] = {}
+        self._coauthors: Dict[str, Tuple[int, Counter]] = {}  # key -> (postings counted, counts)
+        self._refreshed: Dict[str, Tuple[float, Optional[datetime]]] = {}  # key -> (monotonic, watermark)
+        self._linked: Dict[str, Set[str]] = {}  # key -> IDs of papers arXiv returned for it
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, name: str) -> bool:
+        return author_key(name) in self._postings
+
+    def add(self, records: Iterable[PaperRecord]) -> int:
+        """Index papers by each of their authors. Returns how many were new."""
+        added = 0
+        with self._lock:
+            for record in records:
+                ordinal = self._ordinals.get(record.arxiv_id)
+                if ordinal is not None:
+                    # Newer metadata for a known paper; its authors keep their postings
+                    if self._records[ordinal].version < record.version:
+                        self._records[ordinal] = record
+                    continue
+                self._index(record)
+                added += 1
+            if len(self._records) > self.max_papers:
+                self._evict(len(self._records) - self.max_papers * 3 // 4)
+        return added
+
+    def link(self, name: str, records: Iterable[PaperRecord]) -> None:
+        """
+        List records under name's key as well, whatever spelling their author
+        lists use; for the papers arXiv returned for a query on name.
+        """
+        key = author_key(name)
+        if key is None:
+            return
+        with self._lock:
+            for record in records:
+                if record.arxiv_id not in self._ordinals:
+                    self._index(record)
+                self._link(key, record.arxiv_id)
+            self._names.setdefault(key, name)
+            if len(self._records) > self.max_papers:
+                self._evict(len(self._records) - self.max_papers * 3 // 4)
+
+    def papers(self, key: str, category: Optional[str] = None) -> List[PaperRecord]:
+        """The author's indexed papers, newest first, optionally only those listed in category."""
+        with self._lock:
+            records = [self._records[i] for i in self._postings.get(key, ())]
+        if category:
+            records = [r for r in records if category in r.categories]
+        records.sort(key=lambda r: r.published.timestamp() if r.published else 0.0, reverse=True)
+        return records
+
+    def coauthors(self, key: str, k: int = 10) -> List[Tuple[str, int]]:
+        """The author's k most frequent co-authors as (display name, shared papers)."""
+        with self._lock:
+            postings = self._postings.get(key)
+            if postings is None:
+                return []
+            counted, counts = self._coauthors.get(key, (0, Counter()))
+            for ordinal in postings[counted:]:
+                authors = self._records[ordinal].authors
+                if len(authors) <= self.max_authors_per_paper:
+                    counts.update({other for other in map(author_key, authors) if other and other != key})
+            self._coauthors[key] = (len(postings), counts)
+            return [(self._names.get(other, other), n) for other, n in counts.most_common(k)]
+
+    def profile(self, key: str, coauthors: int = 10) -> Optional[AuthorProfile]:
+        if key not in self._postings:
+            return None
+        papers = self.papers(key)
+        categories = Counter(r.primary_category for r in papers if r.primary_category)
+        return AuthorProfile(
+            key=key,
+            name=self._names.get(key, key),
+            papers=papers,
+            categories=categories.most_common(),
+            coauthors=self.coauthors(key, coauthors),
+            watermark=self.watermark(key),
+        )
+
+    # Upstream refresh bookkeeping
+
+    def needs_refresh(self, key: str) -> bool:
+        refreshed = self._refreshed.get(key)
+        return refreshed is None or time.monotonic() - refreshed[0] >= self.refresh_interval
+
+    def watermark(self, key: str) -> Optional[datetime]:
+        """Newest submission fetched from arXiv for this author, or None if never fetched."""
+        refreshed = self._refreshed.get(key)
+        return refreshed[1] if refreshed else None
+
+    def mark_refreshed(self, key: str, fetched_at: datetime) -> None:
+        """Record a completed fetch: the watermark becomes the author's newest paper."""
+        newest = max((r.published for r in self.papers(key) if r.published), default=None)
+        with self._lock:
+            candidates = [w for w in (newest, self.watermark(key)) if w is not None]
+            # An author without papers is caught up to the time of the fetch
+            self._refreshed[key] = (time.monotonic(), max(candidates) if candidates else fetched_at)
+
+    # Internals (caller holds self._lock)
+
+    def _index(self, record: PaperRecord) -> None:
+        ordinal = len(self._records)
+        self._records.append(record)
+        self._ordinals[record.arxiv_id] = ordinal
+        for name in record.authors:
+            key = author_key(name)
+            if key is None:
+                continue
+            postings = self._postings.get(key)
+            if postings is None:
+                postings = self._postings[key] = array("I")
+            if not postings or postings[-1] != ordinal:
+                postings.append(ordinal)
+            # Prefer the fullest spelling (given names over initials)
+            if len(name) > len(self._names.get(key, "")):
+                self._names[key] = name
+
+    def _link(self, key: str, arxiv_id: str) -> None:
+        self._linked.setdefault(key, set()).add(arxiv_id)
+        ordinal = self._ordinals[arxiv_id]
+        postings = self._postings.get(key)
+        if postings is None:
+            postings = self._postings[key] = array("I")
+        if ordinal not in postings:
+            postings.append(ordinal)
+
+    def _evict(self, count: int) -> None:
+        dropped, kept = self._records[:count], self._records[count:]
+        affected = {k for r in dropped for k in map(author_key, r.authors) if k}
+        dropped_ids = {r.arxiv_id for r in dropped}
+        affected.update(k for k, ids in self._linked.items() if not ids.isdisjoint(dropped_ids))
+        for key in affected:
+            # Their lists are no longer complete
+            self._refreshed.pop(key, None)
+
+        self._records, self._ordinals, self._postings = [], {}, {}
+        self._coauthors.clear()
+        for record in kept:
+            self._index(record)
+        for key, ids in list(self._linked.items()):
+            ids -= dropped_ids
+            if not ids:
+                del self._linked[key]
+            for arxiv_id in sorted(ids, key=self._ordinals.__getitem__):
+                self._link(key, arxiv_id)
+        for key in affected:
+            if key not in self._postings:
+                self._names.pop(key, None)
@@ -0,0 +1,5 @@
+"""
+Offline benchmarks: a stand-in arXiv API server plus route and ranking timings.
+
+Run from the repository root with `python -m bench.run`.
+"""
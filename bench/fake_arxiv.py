@@ -0,0 +1,200 @@
+# bench/fake_arxiv.py
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+from paper_record import PaperRecord
+from query_planner import split_date_range
+
+CATEGORIES = ["cs.AI", "cs.LG", "cs.CL", "cs.CV", "math.PR", "stat.ML", "cs.IR", "q-bio.NC"]
+VOCABULARY = (
+    "learning neural network graph transformer attention model language vision "
+    "retrieval search ranking quantum probability stochastic process inference "
+    "bayesian optimization gradient sparse dense embedding contrastive diffusion "
+    "reinforcement policy agent reasoning benchmark dataset evaluation robust "
+    "adversarial federated privacy causal temporal spatial kernel manifold"
+).split()
+SURNAMES = "Smith Chen Wang Garcia Kumar Müller Rossi Tanaka Kim Silva Novak Ahmed".split()
+GIVEN = "Alice Bo Carlos Dana Eun Farah Gil Hana Ivan Jun Kai Lena".split()
+
+
+def make_paper(i: int, now: Optional[datetime] = None, minutes_apart: float = 10.0) -> PaperRecord:
+    """Deterministic synthetic paper number i; paper 0 is the newest."""
+    rng = random.Random(i)
+    now = now or datetime(2025, 1, 1, tzinfo=timezone.utc)
+    published = now - timedelta(minutes=i * minutes_apart)
+    primary = rng.choice(CATEGORIES)
+    categories = tuple(dict.fromkeys([primary] + rng.sample(CATEGORIES, rng.randint(0, 2))))
+    return PaperRecord(
+        arxiv_id=f"{24 + i // 1200000:02d}{(i // 100000) % 12 + 1:02d}.{i % 100000:05d}",
+        version=rng.randint(1, 3),
+        title=" ".join(rng.choices(VOCABULARY, k=rng.randint(5, 12))).capitalize(),
+        summary=" ".join(rng.choices(VOCABULARY, k=rng.randint(80, 200))).capitalize() + ".",
+        authors=tuple(f"{rng.choice(GIVEN)} {rng.choice(SURNAMES)}" for _ in range(rng.randint(1, 6))),
+        published=published,
+        updated=published,
+        primary_category=primary,
+        categories=categories,
+    )
+
+
+def make_corpus(size: int, now: Optional[datetime] = None, minutes_apart: float = 10.0) -> List[PaperRecord]:
+    return [make_paper(i, now, minutes_apart) for i in range(size)]
+
+
+def _timestamp(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def atom_entry(paper: PaperRecord) -> str:
+    authors = "".join(f"<author><name>{escape(a)}</name></author>" for a in paper.authors)
+    tags = "".join(f'<category term="{c}" scheme="http://arxiv.org/schemas/atom"/>' for c in paper.categories)
+    return (
+        "<entry>"
+        f"<id>{paper.entry_id}</id>"
+        f"<updated>{_timestamp(paper.updated)}</updated>"
+        f"<published>{_timestamp(paper.published)}</published>"
+        f"<title>{escape(paper.title)}</title>"
+        f"<summary>{escape(paper.summary)}</summary>"
+        f"{authors}"
+        f'<link href="{paper.entry_id}" rel="alternate" type="text/html"/>'
+        f'<link title="pdf" href="{paper.pdf_link}" rel="related" type="application/pdf"/>'
+        f'<arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="{paper.primary_category}"/>'
+        f"{tags}"
+        "</entry>"
+    )
+
+
+def atom_feed(papers: List[PaperRecord], total: int, start: int) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<feed xmlns="http://www.w3.org/2005/Atom" '
+        'xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/" '
+        'xmlns:arxiv="http://arxiv.org/schemas/atom">'
+        "<title>arXiv Query Results</title>"
+        f"<opensearch:totalResults>{total}</opensearch:totalResults>"
+        f"<opensearch:startIndex>{start}</opensearch:startIndex>"
+        f"<opensearch:itemsPerPage>{len(papers)}</opensearch:itemsPerPage>"
+        + "".join(atom_entry(p) for p in papers)
+        + "</feed>"
+    )
+
+
+class FakeArxivServer:
+    """
+    Local stand-in for export.arxiv.org/api/query, serving a synthetic corpus.
+
+    Understands the query forms this app sends (keywords, ti:, abs:, au:,
+    cat:, AND/OR between them, submittedDate ranges, id_list,
+    start/max_results and sortBy), which is
+    enough to exercise every route. Each response is delayed by `latency`
+    seconds and capped at `max_page_size` entries, like the real API's paging.
+    """
+
+    def __init__(self, corpus: List[PaperRecord], latency: float = 0.0,
+                 max_page_size: int = 2000, host: str = "127.0.0.1", port: int = 0):
+        self.corpus = corpus
+        self.by_id: Dict[str, PaperRecord] = {p.arxiv_id: p for p in corpus}
+        self.latency = latency
+        self.max_page_size = max_page_size
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/api/query"
+
+    def start(self) -> "FakeArxivServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-arxiv", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeArxivServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def query(self, params: Dict[str, str]) -> List[PaperRecord]:
+        """All papers matching the request's search_query / id_list, in response order."""
+        if params.get("id_list"):
+            ids = [i.strip().split("v")[0] for i in params["id_list"].split(",")]
+            return [self.by_id[i] for i in ids if i in self.by_id]
+
+        query, date_range = split_date_range(params.get("search_query", ""))
+        clauses = [c.strip() for c in re.split(r"\bAND\b", query) if c.strip()]
+        matchers = [self._matcher(c) for c in clauses]
+        if date_range is not None:
+            start, end = date_range
+            matchers.append(lambda p: start <= p.published <= end)
+        papers = [p for p in self.corpus if all(m(p) for m in matchers)]
+        if params.get("sortBy") == "relevance":
+            words = set(re.findall(r"[a-z0-9]+", params.get("search_query", "").lower()))
+            papers.sort(key=lambda p: -sum(w in p.title.lower() for w in words))
+        return papers
+
+    @staticmethod
+    def _matcher(clause: str):
+        clause = clause.strip("() ")
+        if " OR " in clause:
+            alternatives = [FakeArxivServer._matcher(c) for c in clause.split(" OR ")]
+            return lambda p: any(m(p) for m in alternatives)
+        field, _, value = clause.partition(":")
+        if not _ or field not in ("ti", "abs", "au", "cat", "all"):
+            field, value = "all", clause
+        value = value.strip('()" ').lower()
+        words = re.findall(r"[a-z0-9]+", value)
+
+        if field == "cat":
+            return lambda p: value in (c.lower() for c in p.categories)
+        if field == "au":
+            return lambda p: any(value in a.lower() for a in p.authors)
+        if field == "ti":
+            return lambda p: any(w in p.title.lower() for w in words)
+        if field == "abs":
+            return lambda p: any(w in p.summary.lower() for w in words)
+        if not words or words == ["all"]:
+            return lambda p: True
+        return lambda p: any(w in p.title.lower() or w in p.summary.lower() for w in words)
+
+    def _handle(self, request: BaseHTTPRequestHandler) -> None:
+        with self._lock:
+            self.requests += 1
+        params = {k: v[0] for k, v in parse_qs(urlparse(request.path).query).items()}
+        if self.latency:
+            time.sleep(self.latency)
+
+        matches = self.query(params)
+        start = int(params.get("start", 0))
+        size = min(int(params.get("max_results", 10)), self.max_page_size)
+        body = atom_feed(matches[start:start + size], len(matches), start).encode("utf-8")
+
+        request.send_response(200)
+        request.send_header("Content-Type", "application/atom+xml; charset=utf-8")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
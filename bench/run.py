@@ -0,0 +1,241 @@
+# bench/run.py
+"""
+Offline benchmark for the Flask routes and the ranking/filter functions.
+
+    python -m bench.run --output bench-$(git rev-parse --short HEAD).json
+    python -m bench.run --compare bench-main.json
+
+Routes run against a local FakeArxivServer (see fake_arxiv.py), so numbers
+depend only on this code and the configured --latency. Results are written
+as JSON; --compare reports the change against an earlier run and exits with
+status 1 if any metric regressed by more than --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+import arxiv
+
+from bench.fake_arxiv import FakeArxivServer, make_corpus
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+    }
+
+
+def _time_requests(client, urls: List[str], before: Callable[[], None] = lambda: None) -> Dict[str, float]:
+    latencies = []
+    started = time.perf_counter()
+    for url in urls:
+        before()
+        start = time.perf_counter()
+        response = client.get(url)
+        response.get_data()
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} returned {response.status_code}")
+    return _summarize(latencies, time.perf_counter() - started)
+
+
+def bench_routes(args, server: FakeArxivServer) -> Dict[str, Dict]:
+    # The app reads its configuration at import time
+    os.environ["QUERY_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bits-bench-"), "cache.sqlite3")
+    os.environ.pop("HARVESTER_ENABLED", None)
+    # The stand-in server needs no politeness delay
+    os.environ["UPSTREAM_RATE"] = "0"
+    arxiv.Client.query_url_format = server.url + "?{}"
+
+    import app as web
+
+    web.get_async_strategy().api_url = server.url
+    client = web.app.test_client()
+
+    def clear_caches():
+        web.query_cache.clear()
+        web.strategy.paper_cache.clear()
+
+    ids = [p.arxiv_id for p in server.corpus[: args.requests]]
+    queries = ["learning", "graph neural network", "quantum probability", "privacy", "diffusion model"]
+    routes = {
+        "/search": [f"/search?query={queries[i % len(queries)]}" for i in range(args.requests)],
+        "/search?author": [f"/search?author=Chen&category=cs.LG" for _ in range(args.requests)],
+        "/browse": [f"/browse?category=cs.AI&days={(7, 30, 90)[i % 3]}" for i in range(args.requests)],
+        "/paper": [f"/paper/{ids[i % len(ids)]}" for i in range(args.requests)],
+    }
+
+    results = {}
+    for name, urls in routes.items():
+        upstream_before = server.requests
+        cold = _time_requests(client, urls, before=clear_caches)
+        cold["upstream_requests"] = server.requests - upstream_before
+
+        upstream_before = server.requests
+        warm = _time_requests(client, urls)
+        warm["upstream_requests"] = server.requests - upstream_before
+
+        # Separate pass: tracemalloc would distort the timings above
+        clear_caches()
+        tracemalloc.start()
+        for url in urls:
+            client.get(url).get_data()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[name] = {"cold": cold, "warm": warm, "peak_alloc_mb": peak / 2 ** 20}
+        print(f"{name:16} cold p50 {cold['p50_ms']:8.2f} ms  warm p50 {warm['p50_ms']:8.2f} ms  "
+              f"warm {warm['rps']:8.1f} req/s", file=sys.stderr)
+    return results
+
+
+def bench_ranking(args) -> Dict[str, Dict]:
+    from search_strategy import ArxivSearchStrategy
+
+    results = {}
+    for size in args.rank_sizes:
+        corpus = make_corpus(size, minutes_apart=1)
+        strategy = ArxivSearchStrategy()
+        strategy.scorer.max_documents = size
+        terms = ["graph", "neural", "network"]
+
+        start = time.perf_counter()
+        strategy.rank_by_relevance_score(corpus, terms, top_k=40)
+        rank_cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        strategy.rank_by_relevance_score(corpus, terms, top_k=40)
+        rank_warm = time.perf_counter() - start
+
+        newest = corpus[0].published
+        start = time.perf_counter()
+        strategy.filter_by_date_range(corpus, newest - timedelta(minutes=size * 0.75), newest - timedelta(minutes=size * 0.25))
+        date_filter = time.perf_counter() - start
+
+        start = time.perf_counter()
+        strategy.filter_by_keywords_in_abstract(corpus, ["quantum", "privacy"])
+        keyword_filter = time.perf_counter() - start
+
+        results[str(size)] = {
+            "rank_cold_ms": rank_cold * 1000,
+            "rank_warm_ms": rank_warm * 1000,
+            "filter_date_ms": date_filter * 1000,
+            "filter_keywords_ms": keyword_filter * 1000,
+        }
+        print(f"{size:>8} papers  rank cold {rank_cold * 1000:9.1f} ms  warm {rank_warm * 1000:9.1f} ms  "
+              f"filters {date_filter * 1000:7.1f} / {keyword_filter * 1000:7.1f} ms", file=sys.stderr)
+    return results
+
+
+def _flatten(data: Dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> bool:
+    """Print metric changes against baseline. Returns False if anything regressed."""
+    now = _flatten({"routes": current["routes"], "ranking": current["ranking"]})
+    before = _flatten({"routes": baseline.get("routes", {}), "ranking": baseline.get("ranking", {})})
+    ok = True
+    print(f"Compared with {baseline.get('meta', {}).get('commit', '?')}:")
+    for name in sorted(now.keys() & before.keys()):
+        old, new = before[name], now[name]
+        if not old or name.endswith(("requests", "upstream_requests")):
+            continue
+        change = (new - old) / old
+        # rps is higher-is-better, everything else (ms, mb) lower-is-better
+        regressed = -change > threshold if name.endswith("rps") else change > threshold
+        ok = ok and not regressed
+        marker = "REGRESSION" if regressed else ""
+        print(f"  {name:45} {old:12.2f} -> {new:12.2f} ({change:+7.1%}) {marker}")
+    return ok
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus-size", type=int, default=5000, help="papers served by the fake arXiv API")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the fake API waits per request")
+    parser.add_argument("--page-size", type=int, default=2000, help="max entries per fake API response")
+    parser.add_argument("--requests", type=int, default=50, help="requests per route and cache state")
+    parser.add_argument("--rank-sizes", type=lambda s: [int(x) for x in s.split(",")],
+                        default=[10000, 100000], help="comma-separated corpus sizes, e.g. 10000,100000,1000000")
+    parser.add_argument("--skip-routes", action="store_true")
+    parser.add_argument("--skip-ranking", action="store_true")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="earlier JSON result to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative change counted as a regression")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "routes": {},
+        "ranking": {},
+    }
+
+    if not args.skip_routes:
+        corpus = make_corpus(args.corpus_size, now=datetime.now(timezone.utc))
+        with FakeArxivServer(corpus, latency=args.latency, max_page_size=args.page_size) as server:
+            report["routes"] = bench_routes(args, server)
+    if not args.skip_ranking:
+        report["ranking"] = bench_ranking(args)
+
+    # KiB on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report["meta"]["max_rss_mb"] = max_rss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# export.py
+import csv
+import io
+import json
+import zlib
+from typing import Callable, Iterable, Iterator, Optional
+
+from paper_record import PaperRecord
+
+# Columns of a CSV export, in order (the keys of PaperRecord.to_dict())
+CSV_COLUMNS = [
+    "arxiv_id", "title", "summary", "authors", "published",
+    "primary_category", "categories", "html_link", "pdf_link",
+]
+
+# Rows are sent in chunks of about this many bytes (before compression)
+CHUNK_SIZE = 64 * 1024
+
+
+def jsonl_rows(records: Iterable[PaperRecord]) -> Iterator[str]:
+    """One JSON object per line."""
+    for record in records:
+        yield json.dumps(record.to_dict(), ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def csv_rows(records: Iterable[PaperRecord], header: bool = True) -> Iterator[str]:
+    """CSV with CSV_COLUMNS; list fields are joined with "; "."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    if header:
+        yield line(CSV_COLUMNS)
+    for record in records:
+        data = record.to_dict()
+        yield line(["; ".join(v) if isinstance(v, list) else v for v in (data[c] for c in CSV_COLUMNS)])
+
+
+def error_row(fmt: str, message: str, resume: str) -> str:
+    """
+    Last row of an export that failed part way: a JSON object with "error"
+    and "resume" (JSONL), or a "#error" row (CSV). resume holds the query
+    string that continues the export after the last row sent.
+    """
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(["#error", message, resume])
+        return buffer.getvalue()
+    return json.dumps({"error": message, "resume": resume}, separators=(",", ":")) + "\n"
+
+
+def chunked(rows: Iterable[str], flush_after: Optional[Callable[[], bool]] = None,
+            chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Group rows into chunks of about chunk_size bytes. A chunk is also sent
+    whenever flush_after() is true after a row, e.g. at the end of each
+    upstream page, so the client is never kept waiting on a full buffer.
+    """
+    parts, size = [], 0
+    for row in rows:
+        data = row.encode("utf-8")
+        parts.append(data)
+        size += len(data)
+        if size >= chunk_size or (flush_after is not None and flush_after()):
+            yield b"".join(parts)
+            parts, size = [], 0
+    if parts:
+        yield b"".join(parts)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a stream into one gzip member, flushing after every chunk."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,131 @@
+# fragment_cache.py
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+# brotli is optional; it is imported on first use
+_brotli = None
+
+
+def load_brotli():
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+            _brotli = brotli
+        except ImportError:
+            _brotli = False
+    return _brotli or None
+
+
+class Fragment(NamedTuple):
+    gzip: bytes
+    br: Optional[bytes]   # None without the brotli package
+    size: int             # uncompressed bytes
+
+    def encodings(self) -> Tuple[str, ...]:
+        return ("br", "gzip") if self.br is not None else ("gzip",)
+
+    def body(self, encoding: str) -> bytes:
+        """The fragment in encoding ("br", "gzip" or "identity")."""
+        if encoding == "br":
+            return self.br
+        if encoding == "gzip":
+            return self.gzip
+        return zlib.decompress(self.gzip, 31)
+
+
+class FragmentCache:
+    """
+    LRU cache of rendered HTML, stored only in compressed form.
+
+    Each entry is compressed once when it is inserted (gzip, plus brotli
+    when the package is installed) and served as is to every client that
+    accepts that encoding; the rare client that accepts neither gets a
+    gunzipped copy. Keys must include everything the HTML depends on,
+    typically the template version, the normalized request and a data
+    version such as the IDs and versions of the papers shown. Memory is
+    bounded by max_bytes of compressed data.
+    """
+
+    def __init__(self, max_bytes: int = 32 << 20, gzip_level: int = 9, brotli_quality: int = 9):
+        self.max_bytes = max_bytes
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+        self._entries: "OrderedDict[str, Fragment]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Fragment]:
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return fragment
+
+    def compress(self, html: str) -> Fragment:
+        data = html.encode("utf-8")
+        brotli = load_brotli()
+        return Fragment(
+            gzip=gzip.compress(data, self.gzip_level, mtime=0),
+            br=brotli.compress(data, quality=self.brotli_quality) if brotli else None,
+            size=len(data),
+        )
+
+    def put(self, key: str, fragment: Fragment) -> None:
+        cost = len(fragment.gzip) + len(fragment.br or b"")
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.gzip) + len(old.br or b"")
+            self._entries[key] = fragment
+            self._bytes += cost
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.gzip) + len(evicted.br or b"")
+                self.evictions += 1
+
+    def get_or_render(self, key: str, render: Callable[[], str],
+                      store: Callable[[], bool] = lambda: True) -> Fragment:
+        """
+        The cached fragment for key, or render() compressed and cached
+        (unless store() says otherwise after rendering).
+        """
+        fragment = self.get(key)
+        if fragment is None:
+            fragment = self.compress(render())
+            if store():
+                self.put(key, fragment)
+        return fragment
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
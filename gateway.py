@@ -0,0 +1,350 @@
+# gateway.py
+import logging
+import struct
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import arxiv
+import requests
+from arxiv import _feed
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# arXiv asks API clients to make no more than one request every 3 seconds
+DEFAULT_RATE = 1 / 3.0
+
+
+class UpstreamUnavailable(Exception):
+    """arXiv is not being called: the circuit is open or the rate limit wait is too long."""
+
+
+# Errors after which callers may fall back to stale cached data
+UPSTREAM_ERRORS = (UpstreamUnavailable, arxiv.ArxivError, requests.RequestException)
+
+
+class TokenBucket:
+    """
+    Token bucket: `rate` requests per second with bursts of up to `capacity`.
+
+    reserve() takes a token, possibly from the future, and returns how long
+    the caller must wait before using it, so waiting happens outside any lock
+    and works for threads and coroutines alike. With `path`, the bucket's
+    state lives in that file under an exclusive lock and is shared by every
+    process using it (e.g. all gunicorn workers); otherwise it is per process.
+    rate <= 0 disables limiting.
+    """
+
+    _STATE = struct.Struct("<dd")  # tokens, updated_at (wall clock, shared across processes)
+
+    def __init__(self, rate: float = DEFAULT_RATE, capacity: float = 1.0, path: Optional[str] = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.path = path
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated = time.time()
+
+    def reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """Seconds to wait before making a request, or None (nothing reserved) if over max_wait."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            if self.path is None:
+                return self._take(max_wait)
+            with open(self.path, "a+b") as f:
+                import fcntl
+
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    data = f.read(self._STATE.size)
+                    if len(data) == self._STATE.size:
+                        self._tokens, self._updated = self._STATE.unpack(data)
+                    wait = self._take(max_wait)
+                    f.seek(0)
+                    f.truncate()
+                    f.write(self._STATE.pack(self._tokens, self._updated))
+                    f.flush()
+                    return wait
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _take(self, max_wait: Optional[float]) -> Optional[float]:
+        # Caller holds the lock(s); tokens may go negative (reservations in the future)
+        now = time.time()
+        tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        wait = max(0.0, (1 - tokens) / self.rate)
+        if max_wait is not None and wait > max_wait:
+            self._tokens, self._updated = tokens, now
+            return None
+        self._tokens, self._updated = tokens - 1, now
+        return wait
+
+
+class AdaptiveBackoff:
+    """
+    Extra delay before each upstream request, driven by what arXiv does.
+
+    Errors double the delay (at least base_delay, at most max_delay, and never
+    less than a Retry-After the server sent); slow responses (above
+    slow_latency) raise it by half. Fast successes halve it back towards zero.
+    """
+
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 60.0, slow_latency: float = 5.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.slow_latency = slow_latency
+        self.delay = 0.0
+        self._lock = threading.Lock()
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            if latency > self.slow_latency:
+                self.delay = min(self.max_delay, max(self.base_delay, self.delay * 1.5))
+            else:
+                self.delay = self.delay / 2 if self.delay > 0.05 else 0.0
+
+    def record_failure(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self.delay = min(self.max_delay, max(self.base_delay, self.delay * 2))
+            if retry_after is not None:
+                self.delay = max(self.delay, min(retry_after, self.max_delay))
+
+
+class CircuitBreaker:
+    """
+    Stops calling arXiv after failure_threshold consecutive failures.
+
+    While open, calls fail immediately (callers serve stale data instead).
+    After reset_timeout seconds one trial call is let through (half-open):
+    success closes the circuit, failure opens it again.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def cancel(self) -> None:
+        """An allowed call was not made after all; frees the half-open trial slot."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("arXiv circuit opened after %d failures", self.failures)
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class UpstreamGateway:
+    """
+    Every arXiv API request in the process goes through one gateway: a token
+    bucket (shared with other workers when it has a path), adaptive backoff,
+    a circuit breaker, and a pooled keep-alive HTTP session. Waits longer
+    than max_wait fail fast with UpstreamUnavailable instead of tying up a
+    request thread.
+    """
+
+    def __init__(self, bucket: Optional[TokenBucket] = None, backoff: Optional[AdaptiveBackoff] = None,
+                 breaker: Optional[CircuitBreaker] = None, pool_size: int = 10,
+                 timeout: float = 15.0, max_wait: float = 10.0):
+        self.bucket = bucket or TokenBucket()
+        self.backoff = backoff or AdaptiveBackoff()
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = timeout
+        self.max_wait = max_wait
+
+        # requests keeps connections alive; the adapter bounds the pool per host
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def before_request(self, max_wait: Optional[float] = None) -> float:
+        """
+        Admit one request; returns the seconds to wait before sending it.
+        max_wait overrides the gateway's (e.g. math.inf for background jobs).
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+        if not self.breaker.allow():
+            raise UpstreamUnavailable("arXiv circuit is open")
+        delay = self.backoff.delay
+        wait = self.bucket.reserve(max_wait=max_wait - delay) if delay <= max_wait else None
+        if wait is None:
+            self.breaker.cancel()
+            raise UpstreamUnavailable("arXiv rate limit wait exceeds max_wait")
+        return wait + delay
+
+    async def before_request_async(self, max_wait: Optional[float] = None) -> None:
+        import asyncio
+
+        wait = self.before_request(max_wait)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except BaseException:
+                self.cancel()
+                raise
+
+    def cancel(self) -> None:
+        """An admitted request ended without an outcome (e.g. cancelled); frees the circuit's trial slot."""
+        self.breaker.cancel()
+
+    def record_success(self, latency: float) -> None:
+        self.backoff.record_success(latency)
+        self.breaker.record_success()
+
+    def record_failure(self, retry_after: Optional[float] = None) -> None:
+        self.backoff.record_failure(retry_after)
+        self.breaker.record_failure()
+
+    def client(self, page_size: int = 100, delay_seconds: float = 0.0, num_retries: int = 3,
+               max_wait: Optional[float] = None) -> "GatewayClient":
+        return GatewayClient(self, page_size=page_size, delay_seconds=delay_seconds,
+                             num_retries=num_retries, max_wait=max_wait)
+
+
+class GatewayClient(arxiv.Client):
+    """
+    arxiv.Client whose page requests go through an UpstreamGateway.
+
+    Pacing comes from the gateway's token bucket; delay_seconds additionally
+    spaces this client's own requests (e.g. one paginated stream), and
+    max_wait overrides the gateway's limit on waiting for a slot. Retries
+    only happen on 5xx/429, connection errors and arXiv's spurious empty pages.
+    It overrides arxiv.Client internals (_parse_feed, arxiv._feed), which is
+    why requirements.txt pins the arxiv version.
+    """
+
+    def __init__(self, gateway: UpstreamGateway, page_size: int = 100,
+                 delay_seconds: float = 0.0, num_retries: int = 3, max_wait: Optional[float] = None):
+        super().__init__(page_size=page_size, delay_seconds=delay_seconds, num_retries=num_retries)
+        self.gateway = gateway
+        self.max_wait = max_wait
+        self._session = gateway.session
+        self._last_request = 0.0
+
+    def _parse_feed(self, url: str, first_page: bool = True, _try_index: int = 0) -> arxiv.ParsedFeed:
+        error: Exception = UpstreamUnavailable("no attempt made")
+        for try_index in range(_try_index, self.num_retries + 1):
+            wait = max(self.gateway.before_request(self.max_wait),
+                       self._last_request + self.delay_seconds - time.monotonic())
+            try:
+                if wait > 0:
+                    time.sleep(wait)
+
+                start = time.perf_counter()
+                self._last_request = time.monotonic()
+                resp = self._session.get(url, headers={"user-agent": arxiv._USER_AGENT},
+                                         timeout=self.gateway.timeout)
+            except requests.RequestException as err:
+                self.gateway.record_failure()
+                error = err
+                logger.debug("arXiv request failed (try %d): %s", try_index, err)
+                continue
+            except BaseException:
+                self.gateway.cancel()
+                raise
+            latency = time.perf_counter() - start
+
+            if resp.status_code != requests.codes.OK:
+                error = arxiv.HTTPError(url, try_index, resp.status_code)
+                if resp.status_code < 500 and resp.status_code != 429:
+                    # Our request is wrong (e.g. a malformed query): not arXiv's health
+                    self.gateway.record_success(latency)
+                    raise error
+                self.gateway.record_failure(_retry_after(resp.headers.get("Retry-After")))
+                continue
+
+            try:
+                feed = _feed.parse(resp.content)
+            except BaseException:
+                self.gateway.cancel()
+                raise
+            if not feed.results and not first_page:
+                self.gateway.record_failure()
+                error = arxiv.UnexpectedEmptyPageError(url, try_index, feed)
+                continue
+            self.gateway.record_success(latency)
+            return feed
+        raise error
+
+
+def register_metrics(gateway: UpstreamGateway) -> None:
+    """Expose the gateway's circuit state and backoff delay on /metrics."""
+    states = (CircuitBreaker.CLOSED, CircuitBreaker.HALF_OPEN, CircuitBreaker.OPEN)
+    metrics.REGISTRY.gauge(
+        "bits_upstream_circuit_open", "1 while the arXiv circuit breaker is in that state",
+        lambda: {(("state", s),): float(gateway.breaker.state == s) for s in states},
+    )
+    metrics.REGISTRY.gauge(
+        "bits_upstream_backoff_seconds", "Adaptive delay added before arXiv requests",
+        lambda: {(): gateway.backoff.delay},
+    )
+
+
+_default_gateway: Optional[UpstreamGateway] = None
+_default_lock = threading.Lock()
+
+
+def default_gateway() -> UpstreamGateway:
+    """Process-wide gateway for code that is not handed one (arXiv's 3 second rate)."""
+    global _default_gateway
+    with _default_lock:
+        if _default_gateway is None:
+            _default_gateway = UpstreamGateway()
+        return _default_gateway
+
+
+def set_default_gateway(gateway: UpstreamGateway) -> None:
+    global _default_gateway
+    with _default_lock:
+        _default_gateway = gateway
@@ -0,0 +1,179 @@
+# harvester.py
+import bisect
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import arxiv
+
+from paper_record import PaperRecord
+from query_planner import plan_query
+
+logger = logging.getLogger(__name__)
+
+
+class CategoryHarvester:
+    """
+    Background thread that keeps a rolling window of recent papers per category.
+
+    Each poll asks arXiv for the category's newest submissions and stops at the
+    category's high-water mark (the newest submission already held), so after
+    the first fill only new papers are downloaded. A poll that hits
+    max_per_poll first leaves a gap below the oldest paper it got; later
+    polls backfill it with a date-range query, and until then recent()
+    doesn't answer for days reaching into the gap. Windows are sorted by
+    submission date, which makes recent(category, days) a bisect + slice.
+    """
+
+    def __init__(self, strategy, categories: Iterable[str], window_days: int = 90,
+                 poll_interval: float = 900, max_per_poll: int = 2000, page_size: int = 100):
+        self.strategy = strategy
+        self.categories = list(dict.fromkeys(categories))
+        self.window_days = window_days
+        self.poll_interval = poll_interval
+        self.max_per_poll = max_per_poll
+        self.page_size = page_size
+
+        # Per category: papers oldest -> newest, with a parallel list of timestamps
+        self._papers: Dict[str, List[PaperRecord]] = {}
+        self._timestamps: Dict[str, List[float]] = {}
+        self._high_water: Dict[str, datetime] = {}
+        # Per category: (start, end) of submissions not fetched yet, if any
+        self._gaps: Dict[str, Tuple[datetime, datetime]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="category-harvester", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def is_ready(self, category: str) -> bool:
+        """Whether the category's whole window is held."""
+        return category in self._high_water and category not in self._gaps
+
+    def high_water_mark(self, category: str) -> Optional[datetime]:
+        return self._high_water.get(category)
+
+    def recent(self, category: str, days: int, limit: Optional[int] = None) -> Optional[List[PaperRecord]]:
+        """
+        Papers in category submitted within the last `days` days, newest first.
+        Returns None if the category isn't harvested (or not filled as far
+        back as `days` yet), so callers can fall back to a live query.
+        """
+        if category not in self._high_water or days > self.window_days:
+            return None
+
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        with self._lock:
+            gap = self._gaps.get(category)
+            if gap is not None and gap[1] >= cutoff:
+                return None
+            cutoff = cutoff.timestamp()
+            papers = self._papers[category]
+            start = bisect.bisect_left(self._timestamps[category], cutoff)
+            if limit is not None:
+                start = max(start, len(papers) - limit)
+            window = papers[start:]
+        window.reverse()
+        return window
+
+    def poll(self, category: str) -> int:
+        """
+        Fetch papers newer than the category's high-water mark, then backfill
+        any gap left by an earlier poll. Returns how many papers were fetched.
+        """
+        now = datetime.now(timezone.utc)
+        window_start = now - timedelta(days=self.window_days)
+        high_water = self._high_water.get(category)
+        stop_at = max(high_water, window_start) if high_water else window_start
+        gap = self._gaps.get(category)
+
+        fresh, oldest = self._fetch(f"cat:{category}", stop_at)
+        if oldest is not None:
+            # Stopped at max_per_poll: nothing is known between stop_at and oldest
+            logger.info("%s: %d papers this poll, backfilling down to %s later",
+                        category, len(fresh), stop_at.isoformat())
+            gap = (gap[0] if gap else stop_at, oldest)
+        elif gap is not None:
+            low = max(gap[0], window_start)
+            backfill, oldest = [], None
+            if gap[1] > low:
+                backfill, oldest = self._fetch(plan_query(f"cat:{category}", low, gap[1]), low)
+            fresh += backfill
+            gap = (low, oldest) if oldest is not None else None
+
+        self.strategy.ingest(fresh)
+        self._merge(category, fresh, window_start, gap)
+        return len(fresh)
+
+    def _fetch(self, query: str, stop_at: datetime) -> Tuple[List[PaperRecord], Optional[datetime]]:
+        """
+        Papers matching query, newest first, down to stop_at. The second value
+        is the oldest submission fetched if max_per_poll ran out before stop_at.
+        """
+        stream = self.strategy.paginated_search(
+            query,
+            page_size=self.page_size,
+            total_results=self.max_per_poll,
+            sort_by=arxiv.SortCriterion.SubmittedDate,
+        )
+        fresh = []
+        seen = 0
+        oldest = None
+        try:
+            for result in stream:
+                seen += 1
+                published = getattr(result, "published", None)
+                if published is None:
+                    continue
+                # Keep papers equal to the mark: they're de-duplicated on merge
+                if published < stop_at:
+                    return fresh, None
+                fresh.append(result)
+                oldest = published
+        finally:
+            stream.close()
+        return fresh, oldest if seen >= self.max_per_poll else None
+
+    def _merge(self, category: str, fresh: List[PaperRecord], window_start: datetime,
+               gap: Optional[Tuple[datetime, datetime]]) -> None:
+        with self._lock:
+            by_id = {r.arxiv_id: r for r in self._papers.get(category, [])}
+            for record in fresh:
+                by_id[record.arxiv_id] = record
+
+            cutoff = window_start.timestamp()
+            papers = sorted(
+                (r for r in by_id.values() if r.published.timestamp() >= cutoff),
+                key=lambda r: r.published,
+            )
+            self._papers[category] = papers
+            self._timestamps[category] = [r.published.timestamp() for r in papers]
+            if papers:
+                self._high_water[category] = papers[-1].published
+            else:
+                self._high_water.setdefault(category, window_start)
+            if gap is not None:
+                self._gaps[category] = gap
+            else:
+                self._gaps.pop(category, None)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            for category in self.categories:
+                if self._stop.is_set():
+                    return
+                try:
+                    count = self.poll(category)
+                    logger.info("Harvested %d new papers for %s", count, category)
+                except Exception:
+                    # Keep serving the current window; try again next round
+                    logger.exception("Harvest of %s failed", category)
+            self._stop.wait(self.poll_interval)
@@ -0,0 +1,245 @@
+# ingest.py
+"""
+Build a PaperStore (see paper_store.py) from arXiv's bulk metadata.
+
+    python ingest.py --output data/papers arxiv-metadata-oai-snapshot.json
+    python ingest.py --output data/papers --categories cs.,stat.ML --workers 8 oai/*.xml.gz
+
+Inputs are the Kaggle metadata snapshot (JSON lines, optionally .gz) or
+OAI-PMH ListRecords responses in the arXiv metadata format (.xml, .xml.gz).
+Parsing runs in a process pool: an uncompressed JSONL file is split into
+byte ranges, other files are one task each. Every task writes its own shard,
+and the shards are merged into the output directory, which replaces the
+previous store atomically. Later inputs win for papers listed more than once.
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import IO, Iterator, List, Optional, Sequence, Tuple
+
+from paper_record import PaperRecord, _intern_all
+from paper_store import ShardWriter, merge_shards
+
+logger = logging.getLogger(__name__)
+
+# Byte range per task when splitting a JSONL file
+CHUNK_BYTES = 64 << 20
+
+_OAI = "{http://www.openarchives.org/OAI/2.0/}"
+_ARXIV = "{http://arxiv.org/OAI/arXiv/}"
+
+
+def _clean(text: Optional[str]) -> str:
+    # Titles and abstracts in the dumps keep arXiv's hard line wraps
+    return " ".join(text.split()) if text else ""
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        if "," in value:
+            # Kaggle versions: "Mon, 2 Apr 2007 19:18:42 GMT"
+            return parsedate_to_datetime(value).astimezone(timezone.utc)
+        return datetime.strptime(value[:10], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+
+def _record(arxiv_id: str, version: int, title: str, summary: str, authors: List[str],
+            published: Optional[datetime], updated: Optional[datetime], categories: List[str]) -> PaperRecord:
+    return PaperRecord(
+        arxiv_id=arxiv_id,
+        version=version,
+        title=_clean(title),
+        summary=_clean(summary),
+        authors=_intern_all(a for a in authors if a),
+        published=published,
+        updated=updated or published,
+        primary_category=sys.intern(categories[0]) if categories else "",
+        categories=_intern_all(categories),
+    )
+
+
+def parse_snapshot_line(line: bytes) -> Optional[PaperRecord]:
+    """One paper from a line of the Kaggle snapshot, or None if the line is unusable."""
+    try:
+        paper = json.loads(line)
+        arxiv_id = paper["id"].strip()
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+    versions = paper.get("versions") or []
+    if paper.get("authors_parsed"):
+        # [last, first, suffix] triples
+        authors = [" ".join(p for p in (parts[1:2] + parts[:1] + parts[2:3]) if p).strip()
+                   for parts in paper["authors_parsed"]]
+    else:
+        authors = [a.strip() for a in (paper.get("authors") or "").replace(" and ", ",").split(",")]
+    return _record(
+        arxiv_id=arxiv_id,
+        version=max(1, len(versions)),
+        title=paper.get("title"),
+        summary=paper.get("abstract"),
+        authors=authors,
+        published=_parse_date(versions[0].get("created")) if versions else None,
+        updated=_parse_date(versions[-1].get("created")) if versions else _parse_date(paper.get("update_date")),
+        categories=(paper.get("categories") or "").split(),
+    )
+
+
+def parse_oai_records(stream: IO[bytes]) -> Iterator[PaperRecord]:
+    """Papers in an OAI-PMH response (metadataPrefix=arXiv); deleted records are skipped."""
+    for _, element in ET.iterparse(stream, events=("end",)):
+        if element.tag != f"{_OAI}record":
+            continue
+        header = element.find(f"{_OAI}header")
+        meta = element.find(f"{_OAI}metadata/{_ARXIV}arXiv")
+        if meta is not None and (header is None or header.get("status") != "deleted"):
+            authors = []
+            for author in meta.iterfind(f"{_ARXIV}authors/{_ARXIV}author"):
+                parts = [author.findtext(f"{_ARXIV}{name}") for name in ("forenames", "keyname", "suffix")]
+                authors.append(" ".join(p.strip() for p in parts if p))
+            published = _parse_date(meta.findtext(f"{_ARXIV}created"))
+            yield _record(
+                arxiv_id=(meta.findtext(f"{_ARXIV}id") or "").strip(),
+                # The arXiv format lists dates only; version history is in arXivRaw
+                version=1,
+                title=meta.findtext(f"{_ARXIV}title"),
+                summary=meta.findtext(f"{_ARXIV}abstract"),
+                authors=authors,
+                published=published,
+                updated=_parse_date(meta.findtext(f"{_ARXIV}updated")),
+                categories=(meta.findtext(f"{_ARXIV}categories") or "").split(),
+            )
+        element.clear()
+
+
+def _is_oai(path: str) -> bool:
+    return path.endswith((".xml", ".xml.gz"))
+
+
+def _open(path: str) -> IO[bytes]:
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _jsonl_range(path: str, start: int, end: int) -> Iterator[PaperRecord]:
+    # A range owns every line that starts inside it
+    with open(path, "rb") as f:
+        if start:
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                record = parse_snapshot_line(line)
+                if record is not None:
+                    yield record
+
+
+def _jsonl_file(path: str) -> Iterator[PaperRecord]:
+    with _open(path) as f:
+        for line in f:
+            if line.strip():
+                record = parse_snapshot_line(line)
+                if record is not None:
+                    yield record
+
+
+Task = Tuple[str, int, int]  # path, start, end (end -1: whole file)
+
+
+def plan_tasks(inputs: Sequence[str], chunk_bytes: int = CHUNK_BYTES) -> List[Task]:
+    """Split the inputs into parse tasks, in input order."""
+    tasks = []
+    for path in inputs:
+        size = os.path.getsize(path)
+        if _is_oai(path) or path.endswith(".gz") or size <= chunk_bytes:
+            tasks.append((path, 0, -1))
+        else:
+            tasks.extend((path, start, min(start + chunk_bytes, size)) for start in range(0, size, chunk_bytes))
+    return tasks
+
+
+def _task_records(task: Task) -> Iterator[PaperRecord]:
+    path, start, end = task
+    if _is_oai(path):
+        with _open(path) as f:
+            yield from parse_oai_records(f)
+    elif end >= 0:
+        yield from _jsonl_range(path, start, end)
+    else:
+        yield from _jsonl_file(path)
+
+
+def ingest_task(task: Task, shard: str, categories: Sequence[str] = ()) -> Tuple[int, int]:
+    """
+    Parse one task into a shard directory, keeping papers listed in a
+    category starting with one of `categories` (all when empty).
+    Returns (papers written, papers skipped).
+    """
+    writer = ShardWriter(shard)
+    skipped = 0
+    for record in _task_records(task):
+        if not record.arxiv_id or (categories and not any(
+                c.startswith(prefix) for c in record.categories for prefix in categories)):
+            skipped += 1
+            continue
+        writer.add(record)
+    return writer.close(), skipped
+
+
+def ingest(inputs: Sequence[str], output: str, workers: Optional[int] = None,
+           categories: Sequence[str] = (), chunk_bytes: int = CHUNK_BYTES) -> int:
+    """Build a store at output from the inputs. Returns the number of distinct papers."""
+    tasks = plan_tasks(inputs, chunk_bytes)
+    work_dir = tempfile.mkdtemp(prefix=".ingest-", dir=os.path.dirname(os.path.abspath(output)))
+    try:
+        shards = [os.path.join(work_dir, f"shard-{i:05d}") for i in range(len(tasks))]
+        written = skipped = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(ingest_task, task, shard, tuple(categories))
+                       for task, shard in zip(tasks, shards)]
+            for task, future in zip(tasks, futures):
+                count, dropped = future.result()
+                written += count
+                skipped += dropped
+                logger.info("%s [%d:%d]: %d papers", task[0], task[1], task[2], count)
+        # The inputs' modification times stand in for when arXiv was queried
+        papers = merge_shards(shards, output, fetched_at=min(os.path.getmtime(path) for path in inputs))
+        logger.info("%d rows written, %d skipped, %d distinct papers in %s", written, skipped, papers, output)
+        return papers
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build a paper store from arXiv bulk metadata.")
+    parser.add_argument("inputs", nargs="+", help="Kaggle snapshot (.json/.jsonl[.gz]) or OAI-PMH (.xml[.gz]) files")
+    parser.add_argument("--output", "-o", required=True, help="store directory (replaced atomically)")
+    parser.add_argument("--workers", "-j", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--categories", default="",
+                        help="comma-separated category prefixes to keep, e.g. cs.,stat.ML (default: all)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    started = time.perf_counter()
+    categories = [c.strip() for c in args.categories.split(",") if c.strip()]
+    papers = ingest(args.inputs, args.output, workers=args.workers, categories=categories)
+    logger.info("done in %.1fs", time.perf_counter() - started)
+    return 0 if papers else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+# local_index.py
+import logging
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional
+
+import arxiv
+
+import metrics
+from gateway import UPSTREAM_ERRORS
+from paper_cache import normalize_arxiv_id
+from paper_record import PaperRecord
+from query_planner import split_date_range
+from search_strategy import ArxivSearchStrategy
+
+logger = logging.getLogger(__name__)
+
+# arXiv field prefixes -> FTS5 columns ("all" searches every column)
+FIELD_COLUMNS = {
+    "ti": "title",
+    "abs": "summary",
+    "au": "authors",
+    "cat": "categories",
+    "all": None,
+}
+
+# Column weights for bm25(); title matches count double, as in rank_by_relevance_score
+BM25_WEIGHTS = (2.0, 1.0, 1.0, 0.5)
+
+_QUERY_TOKEN = re.compile(r'\(|\)|"[^"]*"|[^\s()"]+')
+
+
+def to_fts_query(query: str) -> Optional[str]:
+    """
+    Translate an arXiv API query into an FTS5 MATCH expression.
+
+    Supports bare keywords, quoted phrases, the ti:/abs:/au:/cat:/all: field
+    prefixes, AND / OR / ANDNOT and parentheses, e.g.
+    '(graph neural) AND cat:cs.LG' -> '( "graph" AND "neural" ) AND categories : "cs.LG"'.
+    Returns None when nothing searchable is left.
+    """
+    parts = []
+    pending_column = None
+    has_terms = False
+    # Whether the previous part can be followed by an implicit AND
+    prev_is_operand = False
+
+    for token in _QUERY_TOKEN.findall(query):
+        if token in ("AND", "OR", "ANDNOT"):
+            parts.append("NOT" if token == "ANDNOT" else token)
+            prev_is_operand = False
+            continue
+        if token == "(":
+            if prev_is_operand:
+                parts.append("AND")
+            parts.append(token)
+            prev_is_operand = False
+            continue
+        if token == ")":
+            parts.append(token)
+            prev_is_operand = True
+            continue
+
+        column = pending_column
+        pending_column = None
+        if not token.startswith('"') and ":" in token:
+            field, _, value = token.partition(":")
+            if field.lower() in FIELD_COLUMNS:
+                column = FIELD_COLUMNS[field.lower()]
+                if not value:
+                    # 'ti:"deep learning"' arrives as 'ti:' + '"deep learning"'
+                    pending_column = column
+                    continue
+                token = value
+
+        phrase = token.strip('"').replace('"', "")
+        if not re.search(r"\w", phrase):
+            continue
+
+        term = f'"{phrase}"'
+        if column:
+            term = f"{column} : {term}"
+        if prev_is_operand:
+            parts.append("AND")
+        parts.append(term)
+        prev_is_operand = True
+        has_terms = True
+
+    return " ".join(parts) if has_terms else None
+
+
+class LocalIndex:
+    """
+    SQLite FTS5 inverted index over papers the app has already fetched.
+
+    Full PaperRecords are kept alongside the index so hits can be
+    returned without another API call; each row remembers when it was
+    (re)indexed so callers can ask for recent copies only (max_age). Like
+    QueryCache, the database file is shared by all worker processes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS papers (
+                    rowid INTEGER PRIMARY KEY,
+                    arxiv_id TEXT UNIQUE NOT NULL,
+                    published REAL NOT NULL,
+                    payload BLOB NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts "
+                "USING fts5(title, summary, authors, categories)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(papers)")}
+            if "indexed_at" not in columns:
+                # Indexes from before max_age existed: their rows count as old
+                conn.execute("ALTER TABLE papers ADD COLUMN indexed_at REAL NOT NULL DEFAULT 0")
+
+    def add(self, results: Iterable[PaperRecord]) -> int:
+        """Insert or refresh papers in the index. Returns how many were written."""
+        conn = self._connect()
+        count = 0
+        now = time.time()
+        with conn:
+            for record in results:
+                row = conn.execute(
+                    "SELECT rowid FROM papers WHERE arxiv_id = ?", (record.arxiv_id,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("DELETE FROM papers_fts WHERE rowid = ?", (row[0],))
+                    conn.execute("DELETE FROM papers WHERE rowid = ?", (row[0],))
+
+                published = record.published.timestamp() if record.published else 0.0
+                cur = conn.execute(
+                    "INSERT INTO papers (arxiv_id, published, payload, indexed_at) VALUES (?, ?, ?, ?)",
+                    (record.arxiv_id, published, pickle.dumps(tuple(record), protocol=pickle.HIGHEST_PROTOCOL), now),
+                )
+                conn.execute(
+                    "INSERT INTO papers_fts (rowid, title, summary, authors, categories) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        cur.lastrowid,
+                        record.title,
+                        record.summary,
+                        " ; ".join(record.authors),
+                        " ".join(record.categories),
+                    ),
+                )
+                count += 1
+        return count
+
+    def get(self, arxiv_id: str, max_age: Optional[float] = None) -> Optional[PaperRecord]:
+        """The indexed paper, or None if missing or indexed more than max_age seconds ago."""
+        row = self._connect().execute(
+            "SELECT payload FROM papers WHERE arxiv_id = ? AND indexed_at >= ?",
+            (normalize_arxiv_id(arxiv_id), self._since(max_age)),
+        ).fetchone()
+        return self._load(row[0]) if row else None
+
+    def search(self, query: str, limit: int = 10, by_date: bool = False,
+               max_age: Optional[float] = None) -> List[PaperRecord]:
+        """
+        Answer an arXiv-syntax query from the index, ranked by BM25
+        (or newest first when by_date is set). A submittedDate:[X TO Y]
+        range is applied to the publication date. With max_age, only papers
+        indexed within the last max_age seconds are considered.
+        """
+        # A submittedDate range becomes a filter on the published column
+        query, date_range = split_date_range(query)
+        low, high = (date_range[0].timestamp(), date_range[1].timestamp()) if date_range else (0.0, float("inf"))
+        since = self._since(max_age)
+
+        match = to_fts_query(query)
+        if match is None:
+            if date_range is None:
+                return []
+            rows = self._connect().execute(
+                "SELECT payload FROM papers WHERE published BETWEEN ? AND ? AND indexed_at >= ? "
+                "ORDER BY published DESC LIMIT ?",
+                (low, high, since, limit),
+            ).fetchall()
+            return [self._load(row[0]) for row in rows]
+
+        order = "p.published DESC" if by_date else "bm25(papers_fts, {}, {}, {}, {})".format(*BM25_WEIGHTS)
+        try:
+            rows = self._connect().execute(
+                "SELECT p.payload FROM papers_fts JOIN papers p ON p.rowid = papers_fts.rowid "
+                "WHERE papers_fts MATCH ? AND p.published BETWEEN ? AND ? AND p.indexed_at >= ? "
+                f"ORDER BY {order} LIMIT ?",
+                (match, low, high, since, limit),
+            ).fetchall()
+        except sqlite3.OperationalError:
+            # Malformed expression (e.g. unbalanced parentheses): treat as a miss
+            return []
+        return [self._load(row[0]) for row in rows]
+
+    @staticmethod
+    def _since(max_age: Optional[float]) -> float:
+        return time.time() - max_age if max_age is not None else 0.0
+
+    @staticmethod
+    def _load(payload: bytes) -> PaperRecord:
+        # Records are stored as plain tuples; older indexes hold arxiv.Result pickles
+        value = pickle.loads(payload)
+        if isinstance(value, tuple):
+            return PaperRecord(*value)
+        return PaperRecord.from_result(value)
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread and per process, as in QueryCache
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+class LocalIndexSearchStrategy(ArxivSearchStrategy):
+    """
+    Search backend that answers queries from a LocalIndex first.
+
+    A relevance query is answered locally only when the index holds a full
+    page of it (max_results papers, and at least min_hits) indexed within
+    the last max_age seconds; anything else goes to the live arXiv API and
+    whatever it returns is (re)indexed. Date-sorted queries (recent
+    listings, /browse) always go upstream: the index can't know about
+    papers submitted since. Papers by ID follow the same max_age, so the
+    paper cache's background refreshes reach arXiv. If arXiv fails, older
+    indexed copies are served as stale.
+    """
+
+    def __init__(self, index: LocalIndex, min_hits: int = 1, max_age: float = 3600, **kwargs):
+        super().__init__(**kwargs)
+        self.index = index
+        self.min_hits = min_hits
+        self.max_age = max_age
+        self.local_hits = 0
+        self.local_misses = 0
+
+    def _results(self, method: str, search: arxiv.Search,
+                 cache_ttl: Optional[float] = None) -> Iterator[PaperRecord]:
+        relevance = search.sort_by == arxiv.SortCriterion.Relevance
+        if search.query and relevance and search.max_results is not None:
+            wanted = max(self.min_hits, search.max_results)
+            hits = self.index.search(search.query, limit=wanted, max_age=self.max_age)
+            if len(hits) >= wanted:
+                self.local_hits += 1
+                self._observe(hits)
+                return iter(hits)
+        self.local_misses += 1
+
+        try:
+            results = list(super()._results(method, search, cache_ttl))
+        except UPSTREAM_ERRORS as err:
+            stale = []
+            if search.query:
+                stale = self.index.search(search.query, limit=search.max_results or 100, by_date=not relevance)
+            if not stale:
+                raise
+            logger.warning("%s: arXiv unavailable (%s), serving indexed results", method, err)
+            metrics.mark_stale(method)
+            self._observe(stale)
+            return iter(stale)
+        self.index.add(results)
+        return iter(results)
+
+    def _fetch_papers(self, arxiv_ids: List[str]) -> List[PaperRecord]:
+        results = []
+        missing = []
+        for arxiv_id in arxiv_ids:
+            result = self.index.get(arxiv_id, max_age=self.max_age)
+            if result is None:
+                missing.append(arxiv_id)
+            else:
+                results.append(result)
+        if missing:
+            fetched = super()._fetch_papers(missing)
+            self.index.add(fetched)
+            results.extend(fetched)
+        return results
+
+    def ingest(self, results: List[PaperRecord]) -> None:
+        super().ingest(results)
+        self.index.add(results)
+
+    def _fetch_paper(self, arxiv_id: str) -> Optional[PaperRecord]:
+        result = self.index.get(arxiv_id, max_age=self.max_age)
+        if result is None:
+            result = super()._fetch_paper(arxiv_id)
+            if result is not None:
+                self.index.add([result])
+        return result
+
+    def _stale_paper(self, paper_id: str) -> Optional[PaperRecord]:
+        # Any indexed copy will do once arXiv has failed
+        return super()._stale_paper(paper_id) or self.index.get(paper_id)
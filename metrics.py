@@ -0,0 +1,255 @@
+# metrics.py
+import bisect
+import contextvars
+import functools
+import inspect
+import operator
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Seconds; arXiv calls sit in the upper buckets, ranking and rendering in the lower
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        # Per label set: [bucket counts..., sum, count]
+        self._values: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _labels(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                row[index] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            rows = sorted((key, list(row)) for key, row in self._values.items())
+        for key, row in rows:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {cumulative:g}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {row[-1]:g}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {row[-2]:g}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {row[-1]:g}")
+        return lines
+
+
+class Registry:
+    """
+    Holds the process's metrics and renders them in the Prometheus text format.
+    Gauges are collected on scrape from callbacks, so cache statistics are
+    read from the caches themselves instead of being mirrored here.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._gauges: List[Tuple[str, str, Callable[[], Dict[Labels, float]]]] = []
+
+    def counter(self, name: str, help: str) -> Counter:
+        metric = Counter(name, help)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, buckets=LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help: str, collect: Callable[[], Dict[Labels, float]]) -> None:
+        """Register a gauge whose samples ({labels: value}) are read at scrape time."""
+        self._gauges.append((name, help, collect))
+
+    def expose(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.expose())
+        for name, help, collect in self._gauges:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+            try:
+                samples = collect()
+            except Exception:
+                continue
+            for key, value in sorted(samples.items()):
+                lines.append(f"{name}{_format_labels(key)} {float(value):g}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STRATEGY_SECONDS = REGISTRY.histogram(
+    "bits_strategy_seconds", "Time spent in ArxivSearchStrategy methods")
+STRATEGY_RESULTS = REGISTRY.histogram(
+    "bits_strategy_results", "Papers returned by ArxivSearchStrategy methods", COUNT_BUCKETS)
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    "bits_upstream_seconds", "Latency of arXiv API calls")
+UPSTREAM_CALLS = REGISTRY.counter(
+    "bits_upstream_calls_total", "arXiv API calls made, by caller and outcome")
+PHASE_SECONDS = REGISTRY.histogram(
+    "bits_request_phase_seconds", "Time spent per request phase (search, rank, render)")
+REQUEST_SECONDS = REGISTRY.histogram(
+    "bits_request_seconds", "Total request latency per route")
+STALE_SERVED = REGISTRY.counter(
+    "bits_stale_served_total", "Expired cache entries served because arXiv was unavailable, by caller")
+
+
+# Per-request (phase, seconds) list for the Server-Timing header
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = \
+    contextvars.ContextVar("request_timings", default=None)
+
+
+# Callers that answered part of the current request from expired cache entries.
+# A mutable set, like the timings list, so marks made in asyncio tasks are seen.
+_request_stale: contextvars.ContextVar[Optional[set]] = contextvars.ContextVar("request_stale", default=None)
+
+
+def begin_request() -> None:
+    _request_timings.set([])
+    _request_stale.set(set())
+
+
+def request_timings() -> List[Tuple[str, float]]:
+    return _request_timings.get() or []
+
+
+def mark_stale(caller: str) -> None:
+    """Note that caller served expired data instead of failing (see gateway.py)."""
+    STALE_SERVED.inc(caller=caller)
+    callers = _request_stale.get()
+    if callers is not None:
+        callers.add(caller)
+
+
+def served_stale() -> bool:
+    return bool(_request_stale.get())
+
+
+def record_phase(name: str, seconds: float, route: str = "") -> None:
+    PHASE_SECONDS.observe(seconds, phase=name, route=route)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def phase(name: str, route: str = "") -> Iterator[None]:
+    """Time a block as one request phase."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - start, route)
+
+
+@contextmanager
+def upstream(caller: str) -> Iterator[None]:
+    """Time one arXiv API call and count it by outcome."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        elapsed = time.perf_counter() - start
+        UPSTREAM_SECONDS.observe(elapsed, caller=caller)
+        UPSTREAM_CALLS.inc(caller=caller, outcome=outcome)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append(("upstream", elapsed))
+
+
+def server_timing_header(timings: List[Tuple[str, float]]) -> str:
+    """Format timings as a Server-Timing header, summing repeated phases."""
+    totals: Dict[str, float] = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
+
+
+def timed(method: str):
+    """
+    Record latency and result count of a strategy method.
+    Generator methods are timed until they are exhausted or closed;
+    other iterators are counted only if they know their length.
+    """
+    def decorate(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                count = 0
+                try:
+                    for item in fn(*args, **kwargs):
+                        count += 1
+                        yield item
+                finally:
+                    STRATEGY_SECONDS.observe(time.perf_counter() - start, method=method)
+                    STRATEGY_RESULTS.observe(count, method=method)
+            return gen_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            STRATEGY_SECONDS.observe(time.perf_counter() - start, method=method)
+            if hasattr(result, "__next__"):
+                # Cached searches return iter(list), which knows its length
+                count = operator.length_hint(result, -1)
+                if count >= 0:
+                    STRATEGY_RESULTS.observe(count, method=method)
+            elif isinstance(result, (list, dict)):
+                STRATEGY_RESULTS.observe(len(result), method=method)
+            elif result is not None:
+                STRATEGY_RESULTS.observe(1, method=method)
+            return result
+        return wrapper
+    return decorate
@@ -0,0 +1,161 @@
+# pagination.py
+import base64
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
+
+import arxiv
+
+import metrics
+from gateway import UpstreamGateway, default_gateway
+from paper_record import PaperRecord
+
+# arXiv asks API clients to wait at least 3 seconds between requests
+MIN_REQUEST_INTERVAL = 3.0
+
+
+class PageCursor:
+    """
+    Position in a paginated arXiv query.
+
+    `offset` is the number of results already handed to the consumer, so a
+    harvest that crashes can be resumed from a saved cursor without gaps or
+    duplicates.
+    """
+
+    def __init__(self, query: str, page_size: int = 100, total_results: int = 1000,
+                 sort_by: str = arxiv.SortCriterion.Relevance.value, offset: int = 0):
+        self.query = query
+        self.page_size = page_size
+        self.total_results = total_results
+        self.sort_by = sort_by
+        self.offset = offset
+
+    @property
+    def done(self) -> bool:
+        return self.offset >= self.total_results
+
+    def to_dict(self) -> dict:
+        return {
+            "query": self.query,
+            "page_size": self.page_size,
+            "total_results": self.total_results,
+            "sort_by": self.sort_by,
+            "offset": self.offset,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PageCursor":
+        return cls(**data)
+
+    def encode(self) -> str:
+        """Opaque URL-safe token, e.g. for passing a cursor through a query string."""
+        raw = json.dumps(self.to_dict(), separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @classmethod
+    def decode(cls, token: str) -> "PageCursor":
+        return cls.from_dict(json.loads(base64.urlsafe_b64decode(token.encode("ascii"))))
+
+    def save(self, path: str) -> None:
+        # Write then rename so a crash never leaves a half-written cursor
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["PageCursor"]:
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+class PageStream:
+    """
+    Iterator over a paginated arXiv query.
+
+    Each page is requested with its real `start` offset. While the consumer
+    works through page N, page N+1 is already being fetched on a background
+    thread. Requests go through the upstream gateway's rate limiter and the
+    stream itself keeps MIN_REQUEST_INTERVAL between its own requests, so
+    prefetching never exceeds arXiv's rate limit. A stream waits as long as
+    needed for a rate limit slot.
+
+    The cursor advances with every result yielded. When checkpoint_path is
+    set, it is saved after each page has been consumed and when the stream
+    is closed.
+    """
+
+    def __init__(self, cursor: PageCursor, checkpoint_path: Optional[str] = None,
+                 min_interval: float = MIN_REQUEST_INTERVAL, prefetch: bool = True,
+                 gateway: Optional[UpstreamGateway] = None):
+        self.cursor = cursor
+        self.checkpoint_path = checkpoint_path
+        self.prefetch = prefetch
+        self.pages_fetched = 0
+
+        self._client = (gateway or default_gateway()).client(
+            page_size=cursor.page_size, delay_seconds=min_interval, max_wait=math.inf,
+        )
+        self._iterator = self._iterate()
+
+    def __iter__(self) -> "PageStream":
+        return self
+
+    def __next__(self) -> PaperRecord:
+        return next(self._iterator)
+
+    def close(self) -> None:
+        self._iterator.close()
+
+    def fetch_page(self, offset: int) -> List[PaperRecord]:
+        """Download the page of results starting at offset."""
+        size = min(self.cursor.page_size, self.cursor.total_results - offset)
+        if size <= 0:
+            return []
+        search = arxiv.Search(
+            query=self.cursor.query,
+            max_results=offset + size,
+            sort_by=arxiv.SortCriterion(self.cursor.sort_by),
+        )
+        with metrics.upstream("paginated_search"):
+            page = [PaperRecord.from_result(r) for r in self._client.results(search, offset=offset)]
+        self.pages_fetched += 1
+        return page
+
+    def _iterate(self) -> Iterator[PaperRecord]:
+        cursor = self.cursor
+        if cursor.done:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="arxiv-prefetch")
+        pending = executor.submit(self.fetch_page, cursor.offset)
+        try:
+            while pending is not None:
+                page = pending.result()
+                next_offset = cursor.offset + len(page)
+                # A short page means the result set is exhausted
+                has_more = len(page) == cursor.page_size and next_offset < cursor.total_results
+
+                pending = None
+                if has_more and self.prefetch:
+                    pending = executor.submit(self.fetch_page, next_offset)
+
+                for result in page:
+                    cursor.offset += 1
+                    yield result
+
+                if self.checkpoint_path:
+                    cursor.save(self.checkpoint_path)
+
+                if has_more and not self.prefetch:
+                    pending = executor.submit(self.fetch_page, next_offset)
+        finally:
+            # Don't wait for an in-flight prefetch if the consumer stopped early
+            executor.shutdown(wait=False, cancel_futures=True)
+            if self.checkpoint_path:
+                cursor.save(self.checkpoint_path)
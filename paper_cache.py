@@ -0,0 +1,190 @@
+# paper_cache.py
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_ID_PREFIX = re.compile(r"^(?:https?://(?:export\.)?arxiv\.org/(?:abs|pdf)/|arxiv:)", re.IGNORECASE)
+_VERSION_SUFFIX = re.compile(r"v\d+$")
+# Version-less IDs: new style (2401.12345, 0704.0001) and old style (hep-th/9901001, math.AG/0601001)
+_ARXIV_ID = re.compile(r"^(?:\d{4}\.\d{4,5}|[a-z]+(?:-[a-z]+)*(?:\.[A-Z]{2})?/\d{7})$")
+
+
+def normalize_arxiv_id(arxiv_id: str) -> str:
+    """
+    Reduce an arXiv ID or URL to its version-less form,
+    e.g. "http://arxiv.org/abs/2401.12345v2" -> "2401.12345".
+    """
+    arxiv_id = _ID_PREFIX.sub("", arxiv_id.strip())
+    if arxiv_id.endswith(".pdf"):
+        arxiv_id = arxiv_id[:-4]
+    return _VERSION_SUFFIX.sub("", arxiv_id)
+
+
+def is_arxiv_id(paper_id: str) -> bool:
+    """Whether a normalized ID has the shape of a new- or old-style arXiv ID."""
+    return _ARXIV_ID.match(paper_id) is not None
+
+
+class PaperCache:
+    """
+    Bounded in-process cache for paper metadata.
+
+    - LRU eviction once max_size entries are stored
+    - Entries are fresh for `ttl` seconds
+    - For a further `stale_ttl` seconds a stale entry is still served,
+      while a background thread reloads it (stale-while-revalidate)
+    - Older entries count as misses and are loaded synchronously
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600, stale_ttl: float = 86400):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (stored_at, value)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refresh_errors = 0
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for key, calling loader() on a miss."""
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self.stale_hits += 1
+                    self._schedule_refresh(key, loader)
+                    return entry[1]
+            self.misses += 1
+
+        value = loader()
+        if value is not None:
+            self.put(key, value)
+        return value
+
+    def get_fresh(self, key: str) -> Optional[Any]:
+        """
+        Return the value for key only while it is fresh; stale or missing
+        entries count as a miss and return None (for callers that batch loads).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Return a cached value (fresh or stale) without loading or touching counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry is not None else None
+
+    def put(self, key: str, value: Any, age: float = 0.0) -> None:
+        """Store value; age backdates it (e.g. for entries restored from a snapshot)."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() - age, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def items(self) -> List[Tuple[str, Any, float]]:
+        """(key, value, age in seconds) for every entry, least recently used first."""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value, now - stored_at) for key, (stored_at, value) in self._entries.items()]
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def stats(self) -> Dict[str, float]:
+        """Counters for monitoring; hit_ratio counts stale hits as hits."""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            served = self.hits + self.stale_hits
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "refresh_errors": self.refresh_errors,
+                "hit_ratio": served / lookups if lookups else 0.0,
+            }
+
+    # Stale-while-revalidate
+
+    def refresh_many(self, keys: List[str], loader: Callable[[List[str]], Dict[str, Any]]) -> None:
+        """
+        Reload keys in the background with one loader(keys) call returning
+        {key: value}, e.g. a batched upstream query. Keys already being
+        refreshed are skipped; on failure the current values are kept.
+        """
+        with self._lock:
+            keys = [key for key in keys if key not in self._refreshing]
+            if not keys:
+                return
+            self._refreshing.update(keys)
+        thread = threading.Thread(target=self._refresh_many, args=(keys, loader), daemon=True)
+        thread.start()
+
+    def _refresh_many(self, keys: List[str], loader: Callable[[List[str]], Dict[str, Any]]) -> None:
+        try:
+            for key, value in loader(keys).items():
+                self.put(key, value)
+        except Exception:
+            with self._lock:
+                self.refresh_errors += 1
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(keys)
+
+    def _schedule_refresh(self, key: str, loader: Callable[[], Any]) -> None:
+        # Caller holds self._lock
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        thread = threading.Thread(target=self._refresh, args=(key, loader), daemon=True)
+        thread.start()
+
+    def _refresh(self, key: str, loader: Callable[[], Any]) -> None:
+        try:
+            value = loader()
+            if value is not None:
+                self.put(key, value)
+        except Exception:
+            # Keep serving the stale value; the next stale hit retries
+            with self._lock:
+                self.refresh_errors += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
@@ -0,0 +1,99 @@
+# paper_record.py
+import re
+import sys
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
+
+from paper_cache import normalize_arxiv_id
+
+_VERSION = re.compile(r"v(\d+)$")
+
+
+def _intern_all(values) -> Tuple[str, ...]:
+    # Category codes and common author names repeat across thousands of papers
+    return tuple(sys.intern(v) for v in values if v)
+
+
+class PaperRecord(NamedTuple):
+    """
+    Compact, immutable paper metadata.
+
+    Built once when a paper arrives from arXiv (see from_result) and then used
+    everywhere: caches, the local index, ranking, filters and templates.
+    It is a plain tuple with no per-instance __dict__; category codes and
+    author names are interned. Links are derived from the ID rather than stored.
+    """
+
+    arxiv_id: str  # version-less, e.g. "2401.12345"
+    version: int
+    title: str
+    summary: str
+    authors: Tuple[str, ...]
+    published: Optional[datetime]
+    updated: Optional[datetime]
+    primary_category: str
+    categories: Tuple[str, ...]
+
+    @classmethod
+    def from_result(cls, result) -> "PaperRecord":
+        """Convert an arxiv.Result (or pass a PaperRecord through unchanged)."""
+        if isinstance(result, cls):
+            return result
+
+        short_id = result.entry_id.split("/abs/")[-1]
+        match = _VERSION.search(short_id)
+
+        try:
+            authors = [a.name for a in result.authors]
+        except Exception:
+            authors = []
+
+        return cls(
+            arxiv_id=normalize_arxiv_id(short_id),
+            version=int(match.group(1)) if match else 1,
+            title=result.title or "",
+            summary=result.summary or "",
+            authors=_intern_all(authors),
+            published=getattr(result, "published", None),
+            updated=getattr(result, "updated", None),
+            primary_category=sys.intern(getattr(result, "primary_category", "") or ""),
+            categories=_intern_all(getattr(result, "categories", None) or ()),
+        )
+
+    @property
+    def short_id(self) -> str:
+        return f"{self.arxiv_id}v{self.version}"
+
+    @property
+    def entry_id(self) -> str:
+        return f"http://arxiv.org/abs/{self.short_id}"
+
+    @property
+    def html_link(self) -> str:
+        return self.entry_id
+
+    @property
+    def pdf_link(self) -> str:
+        return f"http://arxiv.org/pdf/{self.short_id}"
+
+    # Same name as arxiv.Result, for code written against it
+    pdf_url = pdf_link
+
+    @property
+    def published_date(self) -> str:
+        """Publication date as YYYY-MM-DD, or "" when unknown."""
+        return self.published.strftime("%Y-%m-%d") if self.published else ""
+
+    def to_dict(self) -> dict:
+        """JSON-friendly form used by the API endpoints."""
+        return {
+            "arxiv_id": self.arxiv_id,
+            "title": self.title,
+            "summary": self.summary,
+            "authors": list(self.authors),
+            "published": self.published_date,
+            "primary_category": self.primary_category,
+            "categories": list(self.categories),
+            "html_link": self.html_link,
+            "pdf_link": self.pdf_link,
+        }
@@ -0,0 +1,350 @@
+# paper_store.py
+import bisect
+import json
+import logging
+import mmap
+import os
+import shutil
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+from paper_cache import normalize_arxiv_id
+from paper_record import PaperRecord, _intern_all
+from ranking import load_numpy
+
+logger = logging.getLogger(__name__)
+
+# Store layout: a directory of flat little-endian column files.
+#   meta.json               row count, category code table, format version
+#   <name>.bin, <name>.off  string columns: UTF-8 blob + uint64 offsets (rows + 1)
+#   published.i64, updated.i64   seconds since the epoch (0 = unknown)
+#   version.u16, primary.u16     version number, primary category code
+#   cat.off (uint32, rows + 1), cat.u16   every listed category code per row
+#   live.u8                 1 for the row kept for its ID (the last one ingested)
+#   order.u32               live rows sorted by arXiv ID, for lookups
+FORMAT = 1
+STRING_COLUMNS = ("id", "title", "abstract", "authors")
+AUTHOR_SEPARATOR = "\x1f"
+
+_ARRAYS = {
+    "published.i64": "q",
+    "updated.i64": "q",
+    "version.u16": "H",
+    "primary.u16": "H",
+    "cat.off": "I",
+    "cat.u16": "H",
+    "live.u8": "B",
+    "order.u32": "I",
+}
+
+
+def _timestamp(value: Optional[datetime]) -> int:
+    return int(value.timestamp()) if value is not None else 0
+
+
+def _datetime(value: int) -> Optional[datetime]:
+    return datetime.fromtimestamp(value, tz=timezone.utc) if value else None
+
+
+class ShardWriter:
+    """
+    Appends papers to the column files of one shard directory. Text goes
+    straight to disk; only offsets and fixed-width values are kept in memory
+    until close(). Ingest workers each write a shard; merge_shards joins them.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._blobs = {name: open(os.path.join(directory, f"{name}.bin"), "wb") for name in STRING_COLUMNS}
+        self._sizes = {name: 0 for name in STRING_COLUMNS}
+        self._offsets = {name: array("Q", [0]) for name in STRING_COLUMNS}
+        self._columns = {name: array(code) for name, code in _ARRAYS.items()
+                         if name not in ("live.u8", "order.u32")}
+        self._columns["cat.off"].append(0)
+        self.categories: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._columns["version.u16"])
+
+    def _code(self, category: str) -> int:
+        return self.categories.setdefault(category, len(self.categories))
+
+    def add(self, record: PaperRecord) -> None:
+        values = {
+            "id": record.arxiv_id,
+            "title": record.title,
+            "abstract": record.summary,
+            "authors": AUTHOR_SEPARATOR.join(record.authors),
+        }
+        for name, value in values.items():
+            data = value.encode("utf-8")
+            self._blobs[name].write(data)
+            self._sizes[name] += len(data)
+            self._offsets[name].append(self._sizes[name])
+
+        columns = self._columns
+        columns["published.i64"].append(_timestamp(record.published))
+        columns["updated.i64"].append(_timestamp(record.updated))
+        columns["version.u16"].append(min(record.version, 0xFFFF))
+        columns["primary.u16"].append(self._code(record.primary_category))
+        columns["cat.u16"].extend(self._code(c) for c in record.categories)
+        columns["cat.off"].append(len(columns["cat.u16"]))
+
+    def close(self) -> int:
+        """Flush the shard and return its row count."""
+        for f in self._blobs.values():
+            f.close()
+        for name, offsets in self._offsets.items():
+            with open(os.path.join(self.directory, f"{name}.off"), "wb") as f:
+                offsets.tofile(f)
+        for name, values in self._columns.items():
+            with open(os.path.join(self.directory, name), "wb") as f:
+                values.tofile(f)
+        with open(os.path.join(self.directory, "meta.json"), "w") as f:
+            json.dump({"rows": len(self), "categories": list(self.categories)}, f)
+        return len(self)
+
+
+def merge_shards(shards: List[str], output: str, fetched_at: Optional[float] = None) -> int:
+    """
+    Join shard directories, in order, into a store at output (replacing any
+    previous store atomically). When an ID occurs more than once, the row
+    ingested last is the live one. fetched_at (Unix time, default now) is
+    when the metadata was downloaded from arXiv. Returns the number of
+    distinct papers.
+    """
+    if sys.byteorder != "little":
+        raise RuntimeError("paper stores are little-endian")
+    tmp = output.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    metas = []
+    for shard in shards:
+        with open(os.path.join(shard, "meta.json")) as f:
+            metas.append(json.load(f))
+    categories: Dict[str, int] = {}
+    for meta in metas:
+        for category in meta["categories"]:
+            categories.setdefault(category, len(categories))
+    rows = sum(meta["rows"] for meta in metas)
+
+    def read(path: str, code: str) -> array:
+        values = array(code)
+        with open(path, "rb") as f:
+            values.frombytes(f.read())
+        return values
+
+    # String blobs are concatenated; offsets are shifted by the bytes before them
+    for name in STRING_COLUMNS:
+        with open(os.path.join(tmp, f"{name}.bin"), "wb") as blob, \
+                open(os.path.join(tmp, f"{name}.off"), "wb") as offsets:
+            base = 0
+            array("Q", [0]).tofile(offsets)
+            for shard in shards:
+                shard_offsets = read(os.path.join(shard, f"{name}.off"), "Q")
+                array("Q", (o + base for o in shard_offsets[1:])).tofile(offsets)
+                with open(os.path.join(shard, f"{name}.bin"), "rb") as f:
+                    shutil.copyfileobj(f, blob, 1 << 20)
+                base += shard_offsets[-1]
+
+    # Fixed-width columns; category codes are mapped to the merged table
+    with open(os.path.join(tmp, "published.i64"), "wb") as published, \
+            open(os.path.join(tmp, "updated.i64"), "wb") as updated, \
+            open(os.path.join(tmp, "version.u16"), "wb") as version, \
+            open(os.path.join(tmp, "primary.u16"), "wb") as primary, \
+            open(os.path.join(tmp, "cat.off"), "wb") as cat_offsets, \
+            open(os.path.join(tmp, "cat.u16"), "wb") as cat_codes:
+        base = 0
+        array("I", [0]).tofile(cat_offsets)
+        for shard, meta in zip(shards, metas):
+            remap = [categories[c] for c in meta["categories"]]
+            shutil.copyfileobj(open(os.path.join(shard, "published.i64"), "rb"), published)
+            shutil.copyfileobj(open(os.path.join(shard, "updated.i64"), "rb"), updated)
+            shutil.copyfileobj(open(os.path.join(shard, "version.u16"), "rb"), version)
+            array("H", (remap[c] for c in read(os.path.join(shard, "primary.u16"), "H"))).tofile(primary)
+            array("H", (remap[c] for c in read(os.path.join(shard, "cat.u16"), "H"))).tofile(cat_codes)
+            shard_offsets = read(os.path.join(shard, "cat.off"), "I")
+            array("I", (o + base for o in shard_offsets[1:])).tofile(cat_offsets)
+            base += shard_offsets[-1]
+
+    # Lookup order: live rows sorted by ID (later duplicates replace earlier ones)
+    id_offsets = read(os.path.join(tmp, "id.off"), "Q")
+    with open(os.path.join(tmp, "id.bin"), "rb") as f:
+        id_blob = f.read()
+    latest: Dict[str, int] = {}
+    for row in range(rows):
+        latest[id_blob[id_offsets[row]:id_offsets[row + 1]].decode("utf-8")] = row
+    del id_blob, id_offsets
+    live = array("B", bytes(rows))
+    for row in latest.values():
+        live[row] = 1
+    with open(os.path.join(tmp, "live.u8"), "wb") as f:
+        live.tofile(f)
+    with open(os.path.join(tmp, "order.u32"), "wb") as f:
+        array("I", (latest[key] for key in sorted(latest))).tofile(f)
+
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({"format": FORMAT, "rows": rows, "papers": len(latest), "categories": list(categories),
+                   "fetched_at": time.time() if fetched_at is None else fetched_at}, f)
+
+    # Swap directories; processes that have the old store mapped keep reading it
+    old = output.rstrip(os.sep) + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(output):
+        os.replace(output, old)
+    os.replace(tmp, output)
+    shutil.rmtree(old, ignore_errors=True)
+    return len(latest)
+
+
+class PaperStore:
+    """
+    Read-only columnar paper store built by ingest.py.
+
+    Every column file is memory-mapped, so opening a store of millions of
+    papers is instant, workers share the page cache, and scans over dates
+    and category codes read the mapped arrays directly (vectorized with
+    NumPy when it is installed). Text is only decoded for rows that are
+    actually turned into PaperRecords.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT:
+            raise ValueError(f"{path} is not a paper store (format {meta.get('format')})")
+        self.rows = meta["rows"]
+        self.categories: List[str] = meta["categories"]
+        # When the metadata was downloaded (Unix time); None for stores built before it was recorded
+        self.fetched_at: Optional[float] = meta.get("fetched_at")
+        self._codes = {c: i for i, c in enumerate(self.categories)}
+
+        self._maps: List[mmap.mmap] = []
+        self._columns = {name: self._map(name, code) for name, code in _ARRAYS.items()}
+        for name in STRING_COLUMNS:
+            self._columns[f"{name}.off"] = self._map(f"{name}.off", "Q")
+            self._columns[f"{name}.bin"] = self._map(f"{name}.bin", "B")
+
+    @classmethod
+    def open(cls, path: str) -> Optional["PaperStore"]:
+        """Open a store, or return None if it is missing or unreadable."""
+        try:
+            return cls(path)
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("Ignoring paper store %s: %s", path, exc)
+            return None
+
+    def _map(self, name: str, code: str) -> memoryview:
+        with open(os.path.join(self.path, name), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(b"").cast(code)
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped).cast(code)
+
+    def __len__(self) -> int:
+        return len(self._columns["order.u32"])
+
+    def _text(self, name: str, row: int) -> str:
+        offsets = self._columns[f"{name}.off"]
+        return bytes(self._columns[f"{name}.bin"][offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def record(self, row: int) -> PaperRecord:
+        columns = self._columns
+        cat_offsets = columns["cat.off"]
+        authors = self._text("authors", row)
+        return PaperRecord(
+            arxiv_id=self._text("id", row),
+            version=columns["version.u16"][row],
+            title=self._text("title", row),
+            summary=self._text("abstract", row),
+            authors=_intern_all(authors.split(AUTHOR_SEPARATOR)) if authors else (),
+            published=_datetime(columns["published.i64"][row]),
+            updated=_datetime(columns["updated.i64"][row]),
+            primary_category=sys.intern(self.categories[columns["primary.u16"][row]]),
+            categories=_intern_all(self.categories[c] for c in columns["cat.u16"][cat_offsets[row]:cat_offsets[row + 1]]),
+        )
+
+    def get(self, arxiv_id: str) -> Optional[PaperRecord]:
+        """The paper with this ID (any version suffix is ignored), or None."""
+        # UTF-8 bytes sort like the code points the order was built from
+        key = normalize_arxiv_id(arxiv_id).encode("utf-8")
+        order, offsets, blob = self._columns["order.u32"], self._columns["id.off"], self._columns["id.bin"]
+
+        def stored_id(i: int) -> bytes:
+            row = order[i]
+            return blob[offsets[row]:offsets[row + 1]].tobytes()
+
+        index = bisect.bisect_left(range(len(order)), key, key=stored_id)
+        if index < len(order) and stored_id(index) == key:
+            return self.record(order[index])
+        return None
+
+    def __contains__(self, arxiv_id: str) -> bool:
+        return self.get(arxiv_id) is not None
+
+    def select(self, category: Optional[str] = None, start: Optional[datetime] = None,
+               end: Optional[datetime] = None) -> List[int]:
+        """
+        Rows of live papers listed in category (primary or cross-listed) and
+        submitted between start and end, newest first. Reads only the date and
+        category arrays.
+        """
+        code = self._codes.get(category) if category else None
+        if category and code is None:
+            return []
+        low = _timestamp(start) if start else None
+        high = _timestamp(end) if end else None
+        columns = self._columns
+
+        np = load_numpy()
+        if np is not None:
+            published = np.frombuffer(columns["published.i64"], dtype=np.int64)
+            mask = np.frombuffer(columns["live.u8"], dtype=np.uint8).astype(bool)
+            if low is not None:
+                mask &= published >= low
+            if high is not None:
+                mask &= published <= high
+            if code is not None:
+                codes = np.frombuffer(columns["cat.u16"], dtype=np.uint16)
+                offsets = np.frombuffer(columns["cat.off"], dtype=np.uint32)
+                listed = np.zeros(self.rows, dtype=bool)
+                owners = np.repeat(np.arange(self.rows), np.diff(offsets))
+                listed[owners[codes == code]] = True
+                mask &= listed
+            rows = np.flatnonzero(mask)
+            return rows[np.argsort(-published[rows], kind="stable")].tolist()
+
+        published, live = columns["published.i64"], columns["live.u8"]
+        codes, offsets = columns["cat.u16"], columns["cat.off"]
+        rows = [
+            row for row in range(self.rows)
+            if live[row]
+            and (low is None or published[row] >= low)
+            and (high is None or published[row] <= high)
+            and (code is None or code in codes[offsets[row]:offsets[row + 1]])
+        ]
+        rows.sort(key=lambda row: -published[row])
+        return rows
+
+    def papers(self, category: Optional[str] = None, start: Optional[datetime] = None,
+               end: Optional[datetime] = None) -> Iterator[PaperRecord]:
+        """Lazily materialized select() results, e.g. as a Pipeline source."""
+        for row in self.select(category, start, end):
+            yield self.record(row)
+
+    def close(self) -> None:
+        self._columns.clear()
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                # Records still reference it; the mapping goes with them
+                pass
+        self._maps.clear()
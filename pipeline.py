@@ -0,0 +1,103 @@
+# pipeline.py
+import heapq
+import itertools
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List
+
+from query_planner import as_utc
+
+
+class Pipeline:
+    """
+    Lazy, chainable processing of search results: source -> filters -> top-k -> limit.
+
+    Nothing runs until the pipeline is iterated, and every stage pulls one
+    paper at a time, so a limit() stops the source early: a paginated source
+    stops fetching pages once enough papers have been produced. top() keeps
+    only k papers in a heap, so memory stays bounded however large the
+    source is. When iteration ends (or the pipeline is closed) the source's
+    close() is called, if it has one.
+
+        strategy.pipeline(strategy.paginated_search("cat:cs.LG", total_results=5000)) \\
+            .abstract_contains(["diffusion"]) \\
+            .limit(100)
+    """
+
+    # top(k) keeps k * TOP_OVERSAMPLE candidates while streaming
+    TOP_OVERSAMPLE = 4
+
+    def __init__(self, source: Iterable, scorer=None):
+        self.source = source
+        self.scorer = scorer
+        self._stages: List[Callable[[Iterator], Iterator]] = []
+
+    def _then(self, stage: Callable[[Iterator], Iterator]) -> "Pipeline":
+        self._stages.append(stage)
+        return self
+
+    def where(self, predicate: Callable) -> "Pipeline":
+        return self._then(lambda items: filter(predicate, items))
+
+    def published_between(self, start: datetime, end: datetime) -> "Pipeline":
+        start, end = as_utc(start), as_utc(end)
+        return self.where(lambda r: r.published is not None and start <= r.published <= end)
+
+    def abstract_contains(self, keywords: List[str]) -> "Pipeline":
+        """Papers whose abstract contains any of keywords (case-insensitive substring)."""
+        keywords = [k.lower() for k in keywords]
+        return self.where(lambda r: any(k in r.summary.lower() for k in keywords))
+
+    def top(self, k: int, query_terms: List[str], with_scores: bool = False) -> "Pipeline":
+        """
+        The k best papers by BM25 score against query_terms, best first
+        (ties keep source order). Consumes everything before it, holding
+        a bounded number of candidates. with_scores yields (score, paper) pairs.
+        k <= 0 yields nothing.
+        """
+        if self.scorer is None:
+            raise ValueError("top() needs a pipeline created with a scorer")
+        if k <= 0:
+            return self._then(lambda items: iter(()))
+        scorer = self.scorer
+
+        # Candidates are selected with IDF weights frozen after the first
+        # `capacity` papers, then the survivors are re-scored with final stats
+        capacity = k * self.TOP_OVERSAMPLE
+
+        def stage(items):
+            items = enumerate(items)
+            buffer = list(itertools.islice(items, capacity))
+            for _, record in buffer:
+                scorer.document(record)
+            prepared = scorer.prepare(query_terms)
+            heap = [(scorer.score(record, query_terms, prepared), -index, record) for index, record in buffer]
+            heapq.heapify(heap)
+
+            for index, record in items:
+                entry = (scorer.score(record, query_terms, prepared), -index, record)
+                if entry[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, entry)
+
+            prepared = scorer.prepare(query_terms)
+            final = [(scorer.score(record, query_terms, prepared), order, record) for _, order, record in heap]
+            for score, _, record in heapq.nlargest(k, final, key=lambda e: e[:2]):
+                yield (score, record) if with_scores else record
+
+        return self._then(stage)
+
+    def limit(self, n: int) -> "Pipeline":
+        return self._then(lambda items: itertools.islice(items, n))
+
+    def __iter__(self) -> Iterator:
+        items = iter(self.source)
+        try:
+            for stage in self._stages:
+                items = stage(items)
+            yield from items
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        close = getattr(self.source, "close", None)
+        if close is not None:
+            close()
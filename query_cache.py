@@ -0,0 +1,164 @@
+# query_cache.py
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class QueryCache:
+    """
+    Persistent search result cache shared by every worker process.
+
+    Results are pickled into a SQLite database (WAL mode, so readers in other
+    gunicorn workers are never blocked by a writer). Each entry carries its own
+    expiry, so routes can pick their own TTL. Once more than max_entries rows
+    are stored, the least recently used ones are evicted.
+    """
+
+    # Check the table size every N writes instead of on every insert
+    PRUNE_EVERY = 50
+    # Bump when the cached value format changes, so old rows are never read
+    KEY_VERSION = 2
+
+    def __init__(self, path: str, max_entries: int = 5000, default_ttl: float = 600):
+        self.path = path
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_cache (
+                    key TEXT PRIMARY KEY,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    payload BLOB NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS query_cache_accessed ON query_cache (accessed_at)"
+            )
+
+    @staticmethod
+    def make_key(method: str, query: str, sort: str, max_results: Optional[int]) -> str:
+        """Canonical key: whitespace-collapsed query plus the search parameters."""
+        canonical = json.dumps([QueryCache.KEY_VERSION, method, " ".join(query.split()), sort, max_results])
+        return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired."""
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT expires_at, payload FROM query_cache WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None or row[0] < now:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        conn.execute("UPDATE query_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        conn.commit()
+        with self._lock:
+            self.hits += 1
+        return pickle.loads(row[1])
+
+    def get_stale(self, key: str) -> Optional[Any]:
+        """
+        Return the value for key even if it has expired (expired rows are
+        kept until LRU eviction), e.g. while arXiv is unavailable.
+        """
+        row = self._connect().execute("SELECT payload FROM query_cache WHERE key = ?", (key,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO query_cache (key, expires_at, accessed_at, payload) "
+            "VALUES (?, ?, ?, ?)",
+            (key, now + ttl, now, payload),
+        )
+        conn.commit()
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """Evict least recently used rows above max_entries. Returns rows deleted."""
+        conn = self._connect()
+        cur = conn.execute(
+            "DELETE FROM query_cache WHERE key IN ("
+            "  SELECT key FROM query_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?"
+            ")",
+            (self.max_entries,),
+        )
+        conn.commit()
+        return cur.rowcount
+
+    def clear(self) -> None:
+        conn = self._connect()
+        conn.execute("DELETE FROM query_cache")
+        conn.commit()
+
+    def export_rows(self) -> List[Tuple[str, float, bytes]]:
+        """Unexpired (key, expires_at, payload) rows, most recently used first."""
+        return self._connect().execute(
+            "SELECT key, expires_at, payload FROM query_cache WHERE expires_at >= ? "
+            "ORDER BY accessed_at DESC LIMIT ?",
+            (time.time(), self.max_entries),
+        ).fetchall()
+
+    def import_rows(self, rows: List[Tuple[str, float, bytes]]) -> int:
+        """Insert exported rows that are still unexpired, keeping any newer local entries."""
+        now = time.time()
+        rows = [(key, expires_at, now, payload) for key, expires_at, payload in rows if expires_at >= now]
+        conn = self._connect()
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO query_cache (key, expires_at, accessed_at, payload) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+        return conn.total_changes - before
+
+    def stats(self) -> Dict[str, float]:
+        size = self._connect().execute("SELECT COUNT(*) FROM query_cache").fetchone()[0]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread and per process (gunicorn forks after import)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
@@ -0,0 +1,71 @@
+# query_planner.py
+import re
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+# arXiv's submittedDate range syntax: submittedDate:[YYYYMMDDHHMM TO YYYYMMDDHHMM] (GMT)
+DATE_FORMAT = "%Y%m%d%H%M"
+_DATE_RANGE = re.compile(r"\s*(?:\bAND\s+)?submittedDate:\[(\d{8,12})\s+TO\s+(\d{8,12})\]", re.IGNORECASE)
+
+
+def as_utc(value: datetime) -> datetime:
+    """Aware UTC datetime; naive datetimes are taken as UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def format_date(value: datetime) -> str:
+    """A datetime as an arXiv submittedDate bound."""
+    return as_utc(value).strftime(DATE_FORMAT)
+
+
+def parse_date(value: str) -> datetime:
+    return datetime.strptime(value.ljust(12, "0"), DATE_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def date_clause(start: Optional[datetime], end: Optional[datetime]) -> str:
+    low = format_date(start) if start else "000101010000"
+    high = format_date(end) if end else "999912312359"
+    return f"submittedDate:[{low} TO {high}]"
+
+
+def abstract_clause(keywords: List[str]) -> Optional[str]:
+    """abs: terms matching any of keywords (phrases are quoted)."""
+    terms = []
+    for keyword in keywords:
+        keyword = " ".join(keyword.replace('"', " ").split())
+        if keyword:
+            terms.append(f'abs:"{keyword}"' if " " in keyword else f"abs:{keyword}")
+    if not terms:
+        return None
+    return terms[0] if len(terms) == 1 else "(" + " OR ".join(terms) + ")"
+
+
+def plan_query(query: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+               abstract_keywords: Optional[List[str]] = None) -> str:
+    """
+    Combine a search query with predicates arXiv can evaluate itself:
+    a submission date range and abstract keywords (any of them).
+    """
+    clauses = [f"({query})"] if query.strip() else []
+    if start is not None or end is not None:
+        clauses.append(date_clause(start, end))
+    if abstract_keywords:
+        clause = abstract_clause(abstract_keywords)
+        if clause:
+            clauses.append(clause)
+    return " AND ".join(clauses)
+
+
+def split_date_range(query: str) -> Tuple[str, Optional[Tuple[datetime, datetime]]]:
+    """
+    Remove a submittedDate range from query, for backends that filter dates
+    themselves (e.g. the local index). Returns (rest of query, (start, end)).
+    """
+    match = _DATE_RANGE.search(query)
+    if match is None:
+        return query, None
+    rest = (query[:match.start()] + query[match.end():]).strip()
+    rest = re.sub(r"^AND\s+", "", rest)
+    return rest, (parse_date(match.group(1)), parse_date(match.group(2)))
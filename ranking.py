@@ -0,0 +1,180 @@
+# ranking.py
+import heapq
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# NumPy only speeds up large candidate sets, so it is imported on first use
+_np = None
+
+
+def load_numpy():
+    global _np
+    if _np is None:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = False
+    return _np or None
+
+from paper_cache import normalize_arxiv_id
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, so "ai" no longer matches inside "said"."""
+    return _TOKEN.findall(text.lower())
+
+
+class RelevanceScorer:
+    """
+    BM25 scoring over title + abstract.
+
+    - Each paper is tokenized once; its term counts are cached by arXiv ID
+    - Document frequencies are updated incrementally as new papers are seen,
+      so IDF reflects every paper still in the cache
+    - Title tokens count title_weight times (the old ranking gave title
+      matches 3x weight: once in the combined text plus 2x bonus)
+    - Candidate sets of VECTORIZE_MIN or more are scored with NumPy
+    """
+
+    VECTORIZE_MIN = 256
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, title_weight: float = 3.0,
+                 max_documents: int = 50000):
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight
+        self.max_documents = max_documents
+
+        self._docs: "OrderedDict[str, Tuple[Dict[str, float], float]]" = OrderedDict()
+        self._df: Counter = Counter()
+        self._total_length = 0.0
+        self._lock = threading.Lock()
+
+    def document(self, result) -> Tuple[Dict[str, float], float]:
+        """Weighted term counts and length for a paper, tokenizing it only once."""
+        key = getattr(result, "arxiv_id", None)
+        if key is None and getattr(result, "entry_id", None):
+            key = normalize_arxiv_id(result.entry_id)
+
+        if key is not None:
+            with self._lock:
+                doc = self._docs.get(key)
+                if doc is not None:
+                    self._docs.move_to_end(key)
+                    return doc
+
+        counts: Dict[str, float] = Counter(tokenize(result.summary or ""))
+        for token in tokenize(result.title or ""):
+            counts[token] += self.title_weight
+        doc = (dict(counts), float(sum(counts.values())))
+
+        if key is not None:
+            with self._lock:
+                if key not in self._docs:
+                    self._add(key, doc)
+        return doc
+
+    def idf(self, term: str) -> float:
+        n = len(self._docs)
+        df = self._df.get(term, 0)
+        return math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+
+    def rank(self, results: Iterable, query_terms: List[str],
+             top_k: Optional[int] = None) -> List[tuple]:
+        """
+        Score results against query_terms.
+        Returns (score, result) tuples, best first; ties keep the input order.
+        With top_k only the best k are returned, selected with a heap.
+        """
+        results = list(results)
+        docs = [self.document(r) for r in results]
+
+        query = Counter(t for term in query_terms for t in tokenize(term))
+        if not results or not query:
+            scored = [(0.0, r) for r in results]
+            return scored[:top_k] if top_k is not None else scored
+
+        terms = list(query)
+        with self._lock:
+            weights = [self.idf(t) * query[t] for t in terms]
+            avg_length = self._total_length / len(self._docs) if self._docs else 0.0
+        if avg_length <= 0:
+            avg_length = (sum(length for _, length in docs) / len(docs)) or 1.0
+
+        if len(docs) >= self.VECTORIZE_MIN and load_numpy() is not None:
+            scores = self._score_vectorized(docs, terms, weights, avg_length)
+        else:
+            scores = [self._score(doc, terms, weights, avg_length) for doc in docs]
+
+        order = range(len(results))
+        if top_k is None:
+            best = sorted(order, key=lambda i: scores[i], reverse=True)
+        else:
+            best = heapq.nlargest(top_k, order, key=lambda i: scores[i])
+        return [(scores[i], results[i]) for i in best]
+
+    def prepare(self, query_terms: List[str]) -> tuple:
+        """
+        Freeze the query's IDF weights and the average document length as
+        they stand now. Passing the result to score() keeps scores of papers
+        seen at different times comparable while more papers stream in.
+        """
+        query = Counter(t for term in query_terms for t in tokenize(term))
+        terms = list(query)
+        with self._lock:
+            weights = [self.idf(t) * query[t] for t in terms]
+            avg_length = self._total_length / len(self._docs) if self._docs else 0.0
+        return terms, weights, avg_length
+
+    def score(self, result, query_terms: List[str], prepared: Optional[tuple] = None) -> float:
+        """
+        Score one paper on its own, e.g. while results are still streaming in.
+        Without `prepared` the collection statistics are read as they stand,
+        so scores may drift slightly as more papers are seen.
+        """
+        doc = self.document(result)
+        terms, weights, avg_length = prepared or self.prepare(query_terms)
+        if not terms:
+            return 0.0
+        return self._score(doc, terms, weights, avg_length or doc[1] or 1.0)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _score(self, doc, terms, weights, avg_length) -> float:
+        counts, length = doc
+        norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+        score = 0.0
+        for term, weight in zip(terms, weights):
+            tf = counts.get(term)
+            if tf:
+                score += weight * tf * (self.k1 + 1) / (tf + norm)
+        return score
+
+    def _score_vectorized(self, docs, terms, weights, avg_length) -> List[float]:
+        np = load_numpy()
+        tf = np.array([[counts.get(t, 0.0) for t in terms] for counts, _ in docs])
+        lengths = np.array([length for _, length in docs])
+        norm = self.k1 * (1 - self.b + self.b * lengths / avg_length)
+        saturated = tf * (self.k1 + 1) / (tf + norm[:, None])
+        return (saturated @ np.array(weights)).tolist()
+
+    def _add(self, key: str, doc) -> None:
+        # Caller holds self._lock
+        self._docs[key] = doc
+        self._df.update(doc[0].keys())
+        self._total_length += doc[1]
+
+        while len(self._docs) > self.max_documents:
+            _, (counts, length) = self._docs.popitem(last=False)
+            for term in counts:
+                self._df[term] -= 1
+                if self._df[term] <= 0:
+                    del self._df[term]
+            self._total_length -= length
@@ -1,31 +1,156 @@
 # search_strategy.py
+import logging
+import time
+
 import arxiv
-from typing import List, Iterator, Optional
+from typing import Dict, Iterable, List, Iterator, Optional
 from datetime import datetime, timedelta, timezone
 
+import metrics
+from author_index import author_key
+from gateway import UPSTREAM_ERRORS, UpstreamGateway, default_gateway
+from metrics import timed
+from pagination import PageCursor, PageStream
+from pipeline import Pipeline
+from paper_cache import PaperCache, is_arxiv_id, normalize_arxiv_id
+from paper_record import PaperRecord
+from query_cache import QueryCache
+from query_planner import as_utc, plan_query
+from ranking import RelevanceScorer
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+def _within(published: Optional[datetime], start: Optional[datetime], end: Optional[datetime]) -> bool:
+    if published is None:
+        return False
+    return (start is None or published >= start) and (end is None or published <= end)
+
+
 class ArxivSearchStrategy:
-    def __init__(self):
-        self.client = arxiv.Client()
+    # Upper bound on papers fetched for one date window
+    MAX_WINDOW_RESULTS = 2000
+    # Papers fetched per author when filling the author index
+    MAX_AUTHOR_PAPERS = 500
+    # Author refreshes re-read this far behind the watermark: papers can be
+    # announced (and become searchable) a few days after their submission date
+    AUTHOR_REFRESH_OVERLAP = timedelta(days=3)
+
+    def __init__(self, cache_size: int = 1024, cache_ttl: float = 3600,
+                 cache_stale_ttl: float = 86400, query_cache: Optional[QueryCache] = None,
+                 gateway: Optional[UpstreamGateway] = None):
+        # Rate limiting, backoff, circuit breaking and connection pooling (see gateway.py)
+        self.gateway = gateway or default_gateway()
+        self.client = self.gateway.client()
+        # Optional shared result cache for search queries (see query_cache.py)
+        self.query_cache = query_cache
+        # Paper metadata keyed by version-less arXiv ID, used by get_paper_by_id
+        self.paper_cache = PaperCache(
+            max_size=cache_size,
+            ttl=cache_ttl,
+            stale_ttl=cache_stale_ttl,
+        )
+        # Tokenized BM25 scorer used by rank_by_relevance_score
+        self.scorer = RelevanceScorer()
+        # Concurrent identical upstream requests share one fetch
+        self.inflight = SingleFlight()
+        # Memory-mapped warm-start snapshot consulted before arXiv (see snapshot.py)
+        self.snapshot = None
+        # Optional PaperStore built offline from arXiv's bulk metadata (see paper_store.py)
+        self.store = None
+        # Seconds after its fetched_at that the store's papers are served as fresh
+        self.store_ttl = 86400.0
+        # Optional SimilarityIndex fed with every paper the strategy sees
+        self.similar = None
+        # Optional AuthorIndex answering author searches from memory (see author_index.py)
+        self.authors = None
+        # Optional SuggestIndex of titles, authors and categories for typeahead (see suggest.py)
+        self.suggestions = None
+
+    def _results(self, method: str, search: arxiv.Search,
+                 cache_ttl: Optional[float] = None) -> Iterator[PaperRecord]:
+        """
+        Run a search through the query cache, if one is configured.
+        On a miss the results are materialized once and stored for cache_ttl
+        seconds (the cache default when None). Concurrent callers with the
+        same query wait on a single upstream fetch and share its results.
+        If arXiv fails, an expired entry is served instead (see metrics.served_stale).
+        """
+        key = QueryCache.make_key(method, search.query, search.sort_by.value, search.max_results)
+        if self.query_cache is not None:
+            results = self.query_cache.get(key)
+            if results is not None:
+                self._observe(results)
+                return iter(results)
+
+        def load():
+            if self.query_cache is not None:
+                # Another worker thread may have filled it while we waited
+                cached = self.query_cache.get(key)
+                if cached is not None:
+                    return cached, False
+            client = self.client
+            if search.max_results and search.max_results > client.page_size:
+                # One large page instead of many rate-limited ones, as in _fetch_author
+                client = self.gateway.client(page_size=search.max_results)
+            try:
+                with metrics.upstream(method):
+                    results = [PaperRecord.from_result(r) for r in client.results(search)]
+            except UPSTREAM_ERRORS as err:
+                stale = self.query_cache.get_stale(key) if self.query_cache is not None else None
+                if stale is None:
+                    raise
+                logger.warning("%s: arXiv unavailable (%s), serving stale results", method, err)
+                return stale, True
+            if self.query_cache is not None:
+                self.query_cache.set(key, results, ttl=cache_ttl)
+            return results, False
 
-    def search_by_keywords(self, keywords: str, max_results: int = 10) -> Iterator[arxiv.Result]:
+        results, stale = self.inflight.do(("search", key), load)
+        if stale:
+            metrics.mark_stale(method)
+        self._observe(results)
+        return iter(results)
+
+    def _observe(self, records: List[PaperRecord]) -> None:
+        if self.similar is not None:
+            self.similar.add(records)
+        if self.authors is not None:
+            self.authors.add(records)
+        if self.suggestions is not None:
+            self.suggestions.add(records)
+
+    @timed("search_by_keywords")
+    def search_by_keywords(self, keywords: str, max_results: int = 10,
+                           cache_ttl: Optional[float] = None) -> Iterator[PaperRecord]:
         """Simple keyword search across all fields."""
         search = arxiv.Search(
             query=keywords,
             max_results=max_results,
             sort_by=arxiv.SortCriterion.Relevance
         )
-        return self.client.results(search)
+        return self._results("search_by_keywords", search, cache_ttl)
     
-    def search_by_author(self, author_name: str, max_results: int = 10) -> Iterator[arxiv.Result]:
-        """Search papers by a specific author."""
+    @timed("search_by_author")
+    def search_by_author(self, author_name: str, max_results: int = 10,
+                         cache_ttl: Optional[float] = None) -> Iterator[PaperRecord]:
+        """
+        Search papers by a specific author, newest first.
+        Full names are answered from the author index when one is configured.
+        """
+        papers = self.author_papers(author_name)
+        if papers is not None:
+            return iter(papers[:max_results])
         search = arxiv.Search(
             query=f"au:{author_name}",
             max_results=max_results,
             sort_by=arxiv.SortCriterion.SubmittedDate
         )
-        return self.client.results(search)
+        return self._results("search_by_author", search, cache_ttl)
     
-    def search_by_title(self, title_keywords: str, max_results: int = 10) -> Iterator[arxiv.Result]:
+    @timed("search_by_title")
+    def search_by_title(self, title_keywords: str, max_results: int = 10,
+                        cache_ttl: Optional[float] = None) -> Iterator[PaperRecord]:
         """Search papers by title keywords."""
         search = arxiv.Search(
             query=f"ti:{title_keywords}",
@@ -33,164 +158,395 @@ class ArxivSearchStrategy:
             sort_by=arxiv.SortCriterion.Relevance
         )
 
-        return self.client.results(search)
+        return self._results("search_by_title", search, cache_ttl)
     
-    def search_by_category(self, category: str, max_results: int = 10) -> Iterator[arxiv.Result]:
+    @timed("search_by_category")
+    def search_by_category(self, category: str, max_results: int = 10,
+                           cache_ttl: Optional[float] = None) -> Iterator[PaperRecord]:
         """Search papers in a specific category (e.g., cs.AI, math.NT)."""
         search = arxiv.Search(
             query=f"cat:{category}",
             max_results=max_results,
             sort_by=arxiv.SortCriterion.SubmittedDate
         )
-        return self.client.results(search)
+        return self._results("search_by_category", search, cache_ttl)
     
-    def get_paper_by_id(self, arxiv_id: str) -> Optional[arxiv.Result]:
-        """Retrieve a specific paper by its arXiv ID."""
+    @timed("get_paper_by_id")
+    def get_paper_by_id(self, arxiv_id: str) -> Optional[PaperRecord]:
+        """
+        Retrieve a specific paper by its arXiv ID.
+        Served from the metadata cache when possible; the version suffix is
+        ignored, so "2401.12345v1" and "2401.12345" share one entry.
+        Paper store copies are served like cached ones while the store is
+        younger than store_ttl; from an older store they are cached as
+        already stale, so they are served at once and refreshed from arXiv in
+        the background. If arXiv fails, an expired cached, snapshotted or
+        stored copy is served.
+        """
+        paper_id = normalize_arxiv_id(arxiv_id)
+        if paper_id not in self.paper_cache and not self._store_fresh():
+            self._cache_stored([paper_id])
+        try:
+            record = self.paper_cache.get(paper_id, lambda: self._load_paper(paper_id))
+        except UPSTREAM_ERRORS:
+            record = self._stale_paper(paper_id)
+            if record is None:
+                raise
+            metrics.mark_stale("get_paper_by_id")
+        if record is not None:
+            self._observe([record])
+        return record
+
+    def _load_paper(self, paper_id: str) -> Optional[PaperRecord]:
+        # Snapshot entries count while they would still be fresh in the cache
+        snapshot = self.snapshot
+        if snapshot is not None:
+            record = snapshot.get(paper_id, max_age=self.paper_cache.ttl)
+            if record is not None:
+                return record
+        if self._store_fresh():
+            record = self._stored_paper(paper_id)
+            if record is not None:
+                return record
+        return self.inflight.do(("paper", paper_id), lambda: self._fetch_paper(paper_id))
+
+    def _stored_paper(self, paper_id: str) -> Optional[PaperRecord]:
+        store = self.store
+        return store.get(paper_id) if store is not None else None
+
+    def _store_fresh(self) -> bool:
+        """Whether the paper store was fetched from arXiv less than store_ttl seconds ago."""
+        store = self.store
+        return (store is not None and store.fetched_at is not None
+                and time.time() - store.fetched_at < self.store_ttl)
+
+    def _cache_stored(self, paper_ids: List[str]) -> List[str]:
+        """
+        Cache paper store copies of paper_ids as stale on arrival, unless the
+        cache already holds a copy. Returns the IDs the store has.
+        """
+        stored = []
+        for paper_id in paper_ids:
+            record = self._stored_paper(paper_id)
+            if record is not None:
+                stored.append(paper_id)
+                if paper_id not in self.paper_cache:
+                    # Older than store_ttl: serve it, but refresh soon
+                    self.paper_cache.put(paper_id, record, age=self.paper_cache.ttl)
+        return stored
+
+    def _refetch_papers(self, paper_ids: List[str], batch_size: int = 100) -> Dict[str, PaperRecord]:
+        # Background refresh for get_papers_by_ids, batched like the foreground path
+        records = {}
+        for start in range(0, len(paper_ids), batch_size):
+            batch = paper_ids[start:start + batch_size]
+            fetched = self.inflight.do(("papers", tuple(batch)), lambda: self._fetch_papers(batch))
+            records.update((record.arxiv_id, record) for record in fetched)
+        return records
+
+    def _stale_paper(self, paper_id: str) -> Optional[PaperRecord]:
+        # Any copy at all, however old
+        record = self.paper_cache.peek(paper_id)
+        if record is None and self.snapshot is not None:
+            record = self.snapshot.get(paper_id)
+        if record is None:
+            record = self._stored_paper(paper_id)
+        return record
+
+    @timed("get_papers_by_ids")
+    def get_papers_by_ids(self, arxiv_ids: List[str], batch_size: int = 100) -> Dict[str, PaperRecord]:
+        """
+        Retrieve many papers at once, keyed by version-less arXiv ID in request order.
+        Cached papers are served from the metadata cache; the rest are fetched
+        with one id_list query per batch_size IDs. Papers in the paper store
+        are served from it; once the store is older than store_ttl they are
+        served (or a newer cached copy) and refreshed from arXiv in one
+        background batch. Unknown IDs are left out, as are malformed
+        ones, which never reach the caches or arXiv.
+        """
+        ids = list(dict.fromkeys(normalize_arxiv_id(i) for i in arxiv_ids if i.strip()))
+
+        found = {}
+        missing = []
+        snapshot = self.snapshot
+        store_fresh = self._store_fresh()
+        for paper_id in ids:
+            if not is_arxiv_id(paper_id):
+                continue
+            result = self.paper_cache.get_fresh(paper_id)
+            if result is None and snapshot is not None:
+                result = snapshot.get(paper_id, max_age=self.paper_cache.ttl)
+                if result is not None:
+                    self.paper_cache.put(paper_id, result)
+            if result is None and store_fresh:
+                result = self._stored_paper(paper_id)
+                if result is not None:
+                    self.paper_cache.put(paper_id, result)
+            if result is None:
+                missing.append(paper_id)
+            else:
+                found[paper_id] = result
+
+        stored = self._cache_stored(missing) if self.store is not None and not store_fresh else []
+        if stored:
+            for paper_id in stored:
+                found[paper_id] = self.paper_cache.peek(paper_id) or self._stored_paper(paper_id)
+            stored_ids = set(stored)
+            missing = [paper_id for paper_id in missing if paper_id not in stored_ids]
+            self.paper_cache.refresh_many(stored, lambda keys: self._refetch_papers(keys, batch_size))
+
+        upstream_failed = False
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            try:
+                fetched = self.inflight.do(("papers", tuple(batch)), lambda: self._fetch_papers(batch))
+            except UPSTREAM_ERRORS as err:
+                logger.warning("get_papers_by_ids: arXiv unavailable (%s), serving stale papers", err)
+                upstream_failed = True
+                break
+            for record in fetched:
+                self.paper_cache.put(record.arxiv_id, record)
+                found[record.arxiv_id] = record
+
+        # Anything not refetched can still be served from a stale entry
+        for paper_id in missing:
+            if paper_id not in found:
+                stale = self._stale_paper(paper_id)
+                if stale is not None:
+                    found[paper_id] = stale
+                    if upstream_failed:
+                        metrics.mark_stale("get_papers_by_ids")
+
+        self._observe(list(found.values()))
+        return {paper_id: found[paper_id] for paper_id in ids if paper_id in found}
+
+    def _fetch_papers(self, arxiv_ids: List[str]) -> List[PaperRecord]:
+        search = arxiv.Search(id_list=arxiv_ids, max_results=len(arxiv_ids))
+        with metrics.upstream("get_papers_by_ids"):
+            return [PaperRecord.from_result(r) for r in self.client.results(search)]
+
+    @timed("ingest")
+    def ingest(self, results: List[PaperRecord]) -> None:
+        """
+        Feed papers obtained elsewhere (e.g. by the category harvester) into
+        the metadata cache and the similarity and author indexes, so their
+        detail pages need no extra API call.
+        """
+        for record in results:
+            self.paper_cache.put(record.arxiv_id, record)
+        self._observe(results)
+
+    def _fetch_paper(self, arxiv_id: str) -> Optional[PaperRecord]:
         search = arxiv.Search(id_list=[arxiv_id])
         try:
-            return next(self.client.results(search))
+            with metrics.upstream("get_paper_by_id"):
+                return PaperRecord.from_result(next(self.client.results(search)))
         except StopIteration:
             return None
     
     #Advanced Search
+    @timed("complex_query")
     def complex_query(self, query: str, max_results: int = 10, 
-                      sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance) -> Iterator[arxiv.Result]:
+                      sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance,
+                      cache_ttl: Optional[float] = None) -> Iterator[PaperRecord]:
         """Boolean operations"""
         search = arxiv.Search(
             query=query,
             max_results=max_results,
             sort_by=sort_by
         )
-        return self.client.results(search)
+        return self._results("complex_query", search, cache_ttl)
     
-    def search_recent_papers(self, keywords: str, days: int = 7, max_results: int = 50) -> Iterator[arxiv.Result]:
-        """Search for papers submitted in the last N days."""
-        search = arxiv.Search(
-            query=keywords,
-            max_results=max_results,
-            sort_by=arxiv.SortCriterion.SubmittedDate
-        )
-        
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        for result in self.client.results(search):
-            if result.published >= cutoff_date:
-                yield result
-            else:
-                break
-
+    @timed("search_recent_papers")
     def search_recent_papers(
         self,
         keywords: str,
         days: int = 7,
-        max_results: int = 50,
-    ) -> Iterator[arxiv.Result]:
+        max_results: Optional[int] = 50,
+        cache_ttl: Optional[float] = None,
+    ) -> Iterator[PaperRecord]:
         """
-        Search for papers submitted in the last N days.
-        Uses UTC time to avoid naive/aware datetime issues.
+        Search for papers submitted in the last N days, newest first.
+        The window is sent to arXiv as a submittedDate range, so papers
+        outside it are never downloaded. max_results=None fetches the whole
+        window, up to MAX_WINDOW_RESULTS.
         """
-        search = arxiv.Search(
-            query=keywords,
+        end = datetime.now(timezone.utc)
+        return self.search_in_date_range(
+            keywords,
+            start_date=end - timedelta(days=days),
+            end_date=end,
             max_results=max_results,
             sort_by=arxiv.SortCriterion.SubmittedDate,
+            cache_ttl=cache_ttl,
         )
 
-        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
-
-        for result in self.client.results(search):
-            pub = getattr(result, "published", None)
-            if pub is None:
-                continue
-
-            if pub >= cutoff_date:
-                yield result
-            else:
-                break
+    @timed("search_in_date_range")
+    def search_in_date_range(self, query: str, start_date: Optional[datetime] = None,
+                             end_date: Optional[datetime] = None,
+                             abstract_keywords: Optional[List[str]] = None,
+                             max_results: Optional[int] = None,
+                             sort_by: arxiv.SortCriterion = arxiv.SortCriterion.SubmittedDate,
+                             cache_ttl: Optional[float] = None) -> Iterator[PaperRecord]:
+        """
+        Search with a date range and abstract keywords pushed into the arXiv
+        query (see query_planner.py) instead of filtering a full download.
+        Bounds are widened to whole hours so the cache key stays stable; the
+        exact range is then checked locally. max_results=None fetches the
+        whole window, up to MAX_WINDOW_RESULTS.
+        """
+        start_date = as_utc(start_date) if start_date else None
+        end_date = as_utc(end_date) if end_date else None
+        start = start_date.replace(minute=0, second=0, microsecond=0) if start_date else None
+        end = end_date.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1) if end_date else None
+        search = arxiv.Search(
+            query=plan_query(query, start, end, abstract_keywords),
+            max_results=min(max_results or self.MAX_WINDOW_RESULTS, self.MAX_WINDOW_RESULTS),
+            sort_by=sort_by,
+        )
+        results = self._results("search_in_date_range", search, cache_ttl)
+        if start_date is None and end_date is None:
+            return results
+        return iter([r for r in results if _within(r.published, start_date, end_date)])
     
-    def search_author_in_category(self, author: str, category: str, max_results: int = 10) -> Iterator[arxiv.Result]:
+    @timed("search_author_in_category")
+    def search_author_in_category(self, author: str, category: str, max_results: int = 10,
+                                  cache_ttl: Optional[float] = None) -> Iterator[PaperRecord]:
         """Find papers by a specific author in a specific category."""
+        papers = self.author_papers(author, category=category)
+        if papers is not None:
+            return iter(papers[:max_results])
         search = arxiv.Search(
             query=f"au:{author} AND cat:{category}",
             max_results=max_results,
             sort_by=arxiv.SortCriterion.SubmittedDate
         )
-        return self.client.results(search)
+        return self._results("search_author_in_category", search, cache_ttl)
     
+    #Authors
+    @timed("author_papers")
+    def author_papers(self, name: str, category: Optional[str] = None) -> Optional[List[PaperRecord]]:
+        """
+        All of an author's papers from the author index, newest first,
+        optionally only those in category. The author is fetched from arXiv
+        the first time, then refreshed with papers newer than their watermark
+        once the index's refresh_interval has passed. Returns None without
+        an index or for names the index can't key (e.g. a bare family name).
+        """
+        authors = self.authors
+        key = author_key(name) if authors is not None else None
+        if key is None:
+            return None
+
+        if authors.needs_refresh(key):
+            watermark = authors.watermark(key)
+            since = watermark - self.AUTHOR_REFRESH_OVERLAP if watermark else None
+            fetched_at = datetime.now(timezone.utc)
+            try:
+                fresh = self.inflight.do(("author", key), lambda: self._fetch_author(name, since))
+            except UPSTREAM_ERRORS as err:
+                if watermark is None:
+                    raise
+                logger.warning("author_papers: arXiv unavailable (%s), serving indexed papers", err)
+                metrics.mark_stale("author_papers")
+            else:
+                self.ingest(fresh)
+                # Also under other spellings arXiv matched ("G. Hinton")
+                authors.link(name, fresh)
+                authors.mark_refreshed(key, fetched_at)
+        return authors.papers(key, category=category)
+
+    def _fetch_author(self, name: str, since: Optional[datetime]) -> List[PaperRecord]:
+        search = arxiv.Search(
+            query=plan_query(f'au:"{name}"', start=since),
+            max_results=self.MAX_AUTHOR_PAPERS,
+            sort_by=arxiv.SortCriterion.SubmittedDate,
+        )
+        # One page for the whole list instead of the default 100 per request
+        client = self.gateway.client(page_size=self.MAX_AUTHOR_PAPERS)
+        with metrics.upstream("author_papers"):
+            return [PaperRecord.from_result(r) for r in client.results(search)]
+
     #Gets results more efficiently 
-    def paginated_search(self, query: str, page_size: int = 100, total_results: int = 1000):
+    @timed("paginated_search")
+    def paginated_search(self, query: str, page_size: int = 100, total_results: int = 1000,
+                         sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance,
+                         cursor: Optional[PageCursor] = None,
+                         checkpoint_path: Optional[str] = None) -> PageStream:
         """
         Retrieve large result sets efficiently with pagination.
-        Respects arXiv's rate limits (3 seconds between requests recommended).
+        Pages are requested at their real offsets and the next page is
+        prefetched in the background, keeping arXiv's 3 second request interval.
+
+        Pass a saved `cursor` (or a `checkpoint_path` holding one) to resume
+        a harvest; with checkpoint_path the cursor is saved after every page.
+        The returned stream exposes its current position as `.cursor`.
         """
-        import time
-        
-        for start in range(0, total_results, page_size):
-            search = arxiv.Search(
+        if cursor is None and checkpoint_path:
+            cursor = PageCursor.load(checkpoint_path)
+        if cursor is None:
+            cursor = PageCursor(
                 query=query,
-                max_results=page_size,
-                sort_by=arxiv.SortCriterion.Relevance
+                page_size=page_size,
+                total_results=total_results,
+                sort_by=sort_by.value,
             )
-            
-            results_page = list(self.client.results(search))
-            
-            if not results_page:
-                break
-            
-            for result in results_page:
-                yield result
-            
-            # Rate limiting - be respectful to arXiv servers
-            time.sleep(3)
+        return PageStream(cursor, checkpoint_path=checkpoint_path, gateway=self.gateway)
     
     #Filtering
     
-    def filter_by_date_range(self, results: Iterator[arxiv.Result], 
-                            start_date: datetime, end_date: datetime) -> List[arxiv.Result]:
-        """Filter results by publication date range."""
-        filtered = []
-        for result in results:
-            if start_date <= result.published <= end_date:
-                filtered.append(result)
-        return filtered
+    def pipeline(self, source: Iterable[PaperRecord]) -> Pipeline:
+        """
+        Lazy filter/rank/limit chain over source (see pipeline.py), e.g.
+        strategy.pipeline(stream).published_between(a, b).top(20, terms).
+        Ranking uses this strategy's scorer.
+        """
+        return Pipeline(source, scorer=self.scorer)
+
+    def store_papers(self, category: Optional[str] = None, start_date: Optional[datetime] = None,
+                     end_date: Optional[datetime] = None) -> Iterator[PaperRecord]:
+        """
+        Papers from the offline store (newest first), selected on its date and
+        category columns without calling arXiv; empty without a store. Use as a
+        pipeline source, e.g. strategy.pipeline(strategy.store_papers("cs.LG")).top(20, terms).
+        """
+        store = self.store
+        if store is None:
+            return iter(())
+        return store.papers(category, as_utc(start_date) if start_date else None,
+                            as_utc(end_date) if end_date else None)
+
+    @timed("filter_by_date_range")
+    def filter_by_date_range(self, results: Iterator[PaperRecord], 
+                            start_date: datetime, end_date: datetime) -> List[PaperRecord]:
+        """
+        Filter results by publication date range.
+        For new searches, search_in_date_range lets arXiv apply the range;
+        pipeline(...).published_between() filters lazily.
+        """
+        return list(self.pipeline(results).published_between(start_date, end_date))
     
-    def filter_by_keywords_in_abstract(self, results: Iterator[arxiv.Result], 
-                                      keywords: List[str]) -> List[arxiv.Result]:
-        """Post-process results to filter by keywords in abstract."""
-        filtered = []
-        keywords_lower = [k.lower() for k in keywords]
-        
-        for result in results:
-            abstract_lower = result.summary.lower()
-            if any(keyword in abstract_lower for keyword in keywords_lower):
-                filtered.append(result)
-        
-        return filtered
+    @timed("filter_by_keywords_in_abstract")
+    def filter_by_keywords_in_abstract(self, results: Iterator[PaperRecord], 
+                                      keywords: List[str]) -> List[PaperRecord]:
+        """
+        Post-process results to filter by keywords in abstract.
+        For new searches, search_in_date_range(abstract_keywords=...) sends
+        them to arXiv as abs: terms instead; pipeline(...).abstract_contains()
+        filters lazily.
+        """
+        return list(self.pipeline(results).abstract_contains(keywords))
     
     
     #Ranking - order to return results 
-    def rank_by_relevance_score(self, results: Iterator[arxiv.Result], 
-                                query_terms: List[str]) -> List[tuple]:
-        """
-        Custom relevance ranking using TF-IDF-like scoring.
-        Returns list of (score, result) tuples sorted by score.
-        """
-        
-        scored_results = []
-        query_terms_lower = [term.lower() for term in query_terms]
-        
-        for result in results:
-            # Combine title and abstract for scoring
-            text = (result.title + " " + result.summary).lower()
-            
-            # Count query term occurrences
-            score = sum(text.count(term) for term in query_terms_lower)
-            
-            # Weight title matches more heavily
-            title_lower = result.title.lower()
-            score += sum(title_lower.count(term) * 2 for term in query_terms_lower)
-            
-            scored_results.append((score, result))
-        
-        # Sort by score descending
-        scored_results.sort(key=lambda x: x[0], reverse=True)
-        return scored_results
\ No newline at end of file
+    @timed("rank_by_relevance_score")
+    def rank_by_relevance_score(self, results: Iterator[PaperRecord], 
+                                query_terms: List[str],
+                                top_k: Optional[int] = None) -> List[tuple]:
+        """
+        Custom relevance ranking using BM25 over title + abstract,
+        with title matches weighted more heavily (see ranking.py).
+        Returns list of (score, result) tuples sorted by score,
+        limited to the best top_k when given.
+        """
+        return self.scorer.rank(results, query_terms, top_k=top_k)
\ No newline at end of file
@@ -0,0 +1,173 @@
+# session_store.py
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+
+class MemorySessionStore:
+    """Per-process session store with LRU eviction (for single-worker setups)."""
+
+    def __init__(self, max_sessions: int = 10000):
+        self.max_sessions = max_sessions
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # sid -> (expires_at, data)
+        self._lock = threading.Lock()
+
+    def load(self, sid: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None or entry[0] < time.time():
+                self._entries.pop(sid, None)
+                return None
+            self._entries.move_to_end(sid)
+            return entry[1]
+
+    def save(self, sid: str, data: str, ttl: float) -> None:
+        with self._lock:
+            self._entries[sid] = (time.time() + ttl, data)
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._entries.pop(sid, None)
+
+
+class SQLiteSessionStore:
+    """Session store shared by every worker process through one SQLite file."""
+
+    # Delete expired sessions every N writes
+    PRUNE_EVERY = 200
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    sid TEXT PRIMARY KEY,
+                    expires_at REAL NOT NULL,
+                    data TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires_at)")
+
+    def load(self, sid: str) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT data FROM sessions WHERE sid = ? AND expires_at >= ?", (sid, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def save(self, sid: str, data: str, ttl: float) -> None:
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (sid, expires_at, data) VALUES (?, ?, ?)",
+            (sid, time.time() + ttl, data),
+        )
+        conn.commit()
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            conn.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),))
+            conn.commit()
+
+    def delete(self, sid: str) -> None:
+        conn = self._connect()
+        conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread and per process (gunicorn forks after import)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid: Optional[str] = None, new: bool = False):
+        def on_update(session):
+            session.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid or secrets.token_urlsafe(24)
+        self.new = new
+        self.modified = False
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """
+    Keeps session data in a server-side store; the cookie only carries a
+    signed session ID. Data is stored as compact JSON and written only when
+    the session changes, so most requests cost one indexed read.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def _signer(self, app) -> Signer:
+        return Signer(app.secret_key, salt="server-session")
+
+    def open_session(self, app, request) -> ServerSession:
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie and app.secret_key:
+            try:
+                sid = self._signer(app).unsign(cookie).decode("ascii")
+            except BadSignature:
+                sid = None
+            if sid:
+                data = self.store.load(sid)
+                if data is not None:
+                    return ServerSession(json.loads(data), sid=sid)
+        return ServerSession(new=True)
+
+    def save_session(self, app, session: ServerSession, response) -> None:
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if session.modified:
+            ttl = app.permanent_session_lifetime.total_seconds()
+            self.store.save(session.sid, json.dumps(dict(session), separators=(",", ":")), ttl)
+        if not (session.new or self.should_set_cookie(app, session)):
+            return
+
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid.encode("ascii")).decode("ascii"),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
@@ -0,0 +1,123 @@
+# similar.py
+import heapq
+import random
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ranking import load_numpy, tokenize
+
+# Too common in abstracts to say anything about similarity
+STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have in into is it its of on or our "
+    "that the their these this to we which with show shows paper propose proposed "
+    "results method methods approach based using use new also".split()
+)
+
+# Mersenne prime for the universal hash family; products stay below 2**62
+_PRIME = (1 << 31) - 1
+
+
+class SimilarityIndex:
+    """
+    In-memory "similar papers" index: MinHash signatures with LSH banding.
+
+    Each paper's title + abstract token set is reduced to num_perm MinHash
+    values, split into `bands` buckets of rows each; papers sharing any bucket
+    are candidates and are ranked by signature agreement (an estimate of
+    Jaccard similarity). With the defaults, pairs around 0.2 Jaccard or more
+    are likely to be found. Papers are added incrementally; the oldest are
+    dropped beyond max_papers.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 32, max_papers: int = 20000,
+                 max_candidates: int = 200, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_papers = max_papers
+        self.max_candidates = max_candidates
+
+        rng = random.Random(seed)
+        self._a = [rng.randrange(1, _PRIME) for _ in range(num_perm)]
+        self._b = [rng.randrange(0, _PRIME) for _ in range(num_perm)]
+
+        self._papers: "OrderedDict[str, tuple]" = OrderedDict()  # id -> (record, signature)
+        self._buckets: Dict[Tuple[int, tuple], Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._papers)
+
+    def __contains__(self, arxiv_id: str) -> bool:
+        return arxiv_id in self._papers
+
+    def add(self, records: Iterable) -> int:
+        """Index papers not seen yet (newer versions replace the old entry). Returns how many were new."""
+        fresh = [r for r in records
+                 if r.arxiv_id not in self._papers or self._papers[r.arxiv_id][0].version < r.version]
+        if not fresh:
+            return 0
+        signatures = [self.signature(f"{r.title} {r.summary}") for r in fresh]
+
+        with self._lock:
+            for record, signature in zip(fresh, signatures):
+                if signature is None:
+                    continue
+                if record.arxiv_id in self._papers:
+                    self._remove(record.arxiv_id)
+                self._papers[record.arxiv_id] = (record, signature)
+                for band in self._bands(signature):
+                    self._buckets.setdefault(band, set()).add(record.arxiv_id)
+            while len(self._papers) > self.max_papers:
+                self._remove(next(iter(self._papers)))
+        return len(fresh)
+
+    def similar(self, arxiv_id: str, k: int = 5) -> List[Tuple[float, object]]:
+        """Up to k (estimated Jaccard, record) pairs most similar to arxiv_id, best first."""
+        with self._lock:
+            entry = self._papers.get(arxiv_id)
+            if entry is None:
+                return []
+            signature = entry[1]
+            # Papers sharing more buckets are likelier matches; only the best are scored
+            collisions = Counter()
+            for band in self._bands(signature):
+                collisions.update(self._buckets.get(band, ()))
+            del collisions[arxiv_id]
+            scored = [
+                (sum(x == y for x, y in zip(signature, self._papers[c][1])) / self.num_perm, self._papers[c][0])
+                for c, _ in collisions.most_common(self.max_candidates)
+            ]
+        return heapq.nlargest(k, scored, key=lambda pair: pair[0])
+
+    def signature(self, text: str) -> Optional[tuple]:
+        """MinHash signature of text's token set, or None if it has no usable tokens."""
+        hashes = {zlib.crc32(t.encode("utf-8")) & _PRIME for t in tokenize(text) if t not in STOPWORDS}
+        if not hashes:
+            return None
+
+        np = load_numpy()
+        if np is not None:
+            values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+            a = np.array(self._a, dtype=np.uint64)[:, None]
+            b = np.array(self._b, dtype=np.uint64)[:, None]
+            return tuple(((a * values + b) % _PRIME).min(axis=1).tolist())
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in zip(self._a, self._b))
+
+    def _bands(self, signature: tuple) -> Iterable[Tuple[int, tuple]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def _remove(self, arxiv_id: str) -> None:
+        # Caller holds self._lock
+        _, signature = self._papers.pop(arxiv_id)
+        for band in self._bands(signature):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(arxiv_id)
+                if not bucket:
+                    del self._buckets[band]
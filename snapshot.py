@@ -0,0 +1,211 @@
+# snapshot.py
+import logging
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from paper_record import PaperRecord
+
+logger = logging.getLogger(__name__)
+
+# File layout (little endian):
+#   header  magic, paper count, offset of the query section, saved_at
+#   index   one fixed-width slot per paper, sorted by arXiv ID:
+#           id (utf-8, NUL padded), payload offset, payload length, cached_at
+#   papers  pickled PaperRecord tuples
+#   queries one pickled list of (key, expires_at, payload) query cache rows
+MAGIC = b"BITSNAP1"
+_HEADER = struct.Struct("<8sIQd")
+_SLOT = struct.Struct("<32sQId")
+
+
+class CacheSnapshot:
+    """
+    Read-only, memory-mapped snapshot of the paper and query caches.
+
+    Papers are looked up by binary search over the fixed-width index and
+    unpickled on demand, so opening a snapshot costs almost nothing and every
+    worker process maps the same page-cache pages instead of holding a copy.
+    Snapshots are replaced atomically, so workers with an older file mapped
+    keep reading it safely.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, self._queries_offset, self.saved_at = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a cache snapshot")
+
+    @classmethod
+    def open(cls, path: str) -> Optional["CacheSnapshot"]:
+        """Open a snapshot, or return None if the file is missing or unreadable."""
+        try:
+            return cls(path)
+        except (OSError, ValueError, struct.error) as exc:
+            if not isinstance(exc, FileNotFoundError):
+                logger.warning("Ignoring cache snapshot %s: %s", path, exc)
+            return None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _slot(self, index: int) -> Tuple[str, int, int, float]:
+        raw_id, offset, length, cached_at = _SLOT.unpack_from(self._map, _HEADER.size + index * _SLOT.size)
+        return raw_id.rstrip(b"\0").decode("utf-8"), offset, length, cached_at
+
+    def get(self, arxiv_id: str, max_age: Optional[float] = None) -> Optional[PaperRecord]:
+        """The snapshotted paper, or None if absent or cached more than max_age seconds ago."""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._slot(mid)[0] < arxiv_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self._count:
+            return None
+
+        key, offset, length, cached_at = self._slot(lo)
+        if key != arxiv_id or (max_age is not None and time.time() - cached_at > max_age):
+            return None
+        return PaperRecord(*pickle.loads(self._map[offset:offset + length]))
+
+    def papers(self) -> Iterable[Tuple[str, PaperRecord, float]]:
+        """All (arxiv_id, record, cached_at) entries, in ID order."""
+        for index in range(self._count):
+            key, offset, length, cached_at = self._slot(index)
+            yield key, PaperRecord(*pickle.loads(self._map[offset:offset + length])), cached_at
+
+    def queries(self) -> List[Tuple[str, float, bytes]]:
+        return pickle.loads(self._map[self._queries_offset:])
+
+    def close(self) -> None:
+        self._map.close()
+
+    @staticmethod
+    def write(path: str, papers: Iterable[Tuple[str, PaperRecord, float]],
+              queries: List[Tuple[str, float, bytes]]) -> int:
+        """
+        Write a snapshot atomically. papers are (arxiv_id, record, cached_at)
+        with cached_at in wall-clock seconds; IDs that don't fit a slot are skipped.
+        Returns the number of papers written.
+        """
+        entries = {}
+        for key, record, cached_at in papers:
+            if len(key.encode("utf-8")) <= 32:
+                entries.setdefault(key, (record, cached_at))
+        keys = sorted(entries)
+
+        payloads = [pickle.dumps(tuple(entries[k][0]), protocol=pickle.HIGHEST_PROTOCOL) for k in keys]
+        offset = _HEADER.size + len(keys) * _SLOT.size
+        slots = []
+        for key, payload in zip(keys, payloads):
+            slots.append(_SLOT.pack(key.encode("utf-8"), offset, len(payload), entries[key][1]))
+            offset += len(payload)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, len(keys), offset, time.time()))
+                f.writelines(slots)
+                f.writelines(payloads)
+                pickle.dump(queries, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return len(keys)
+
+
+class Snapshotter:
+    """
+    Saves the strategy's paper cache and the query cache to a CacheSnapshot
+    every `interval` seconds (and on demand, e.g. at shutdown).
+
+    Each save merges with the file currently on disk (under an exclusive
+    lock on path + ".lock", so workers saving at the same time take turns):
+    the newest copy of every paper is kept, up to max_papers, so the file
+    accumulates what every worker has seen rather than only the last
+    writer's LRU contents.
+    """
+
+    def __init__(self, path: str, strategy, query_cache=None, interval: float = 300,
+                 max_papers: int = 50000):
+        self.path = path
+        self.strategy = strategy
+        self.query_cache = query_cache
+        self.interval = interval
+        self.max_papers = max_papers
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Mapping replaced by the previous save, closed by the next one so
+        # lookups that grabbed it just before the swap can finish
+        self._retired: Optional[CacheSnapshot] = None
+
+    def restore(self) -> Optional[CacheSnapshot]:
+        """Attach the snapshot on disk to the strategy and reload its query cache rows."""
+        snapshot = CacheSnapshot.open(self.path)
+        if snapshot is None:
+            return None
+        self.strategy.snapshot = snapshot
+        restored = 0
+        if self.query_cache is not None:
+            restored = self.query_cache.import_rows(snapshot.queries())
+        logger.info("Warm start from %s: %d papers, %d queries", self.path, len(snapshot), restored)
+        return snapshot
+
+    def save(self) -> int:
+        import fcntl
+
+        with self._lock, open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            now = time.time()
+            papers = [(key, record, now - age) for key, record, age in self.strategy.paper_cache.items()]
+            on_disk = CacheSnapshot.open(self.path)
+            if on_disk is not None:
+                # Whatever other workers have saved since our last look
+                papers.extend(on_disk.papers())
+            # The newest copy of each paper wins, and the newest papers when over the limit
+            newest = {}
+            for key, record, cached_at in sorted(papers, key=lambda entry: entry[2], reverse=True):
+                newest.setdefault(key, (key, record, cached_at))
+            queries = self.query_cache.export_rows() if self.query_cache is not None else []
+
+            count = CacheSnapshot.write(self.path, list(newest.values())[:self.max_papers], queries)
+            if on_disk is not None:
+                on_disk.close()
+
+            previous = getattr(self.strategy, "snapshot", None)
+            self.strategy.snapshot = CacheSnapshot.open(self.path)
+            if self._retired is not None:
+                self._retired.close()
+            self._retired = previous
+            return count
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="cache-snapshotter", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                count = self.save()
+                logger.info("Saved %d papers to %s", count, self.path)
+            except Exception:
+                logger.exception("Cache snapshot to %s failed", self.path)
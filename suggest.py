@@ -0,0 +1,197 @@
+# suggest.py
+import bisect
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from paper_record import PaperRecord
+
+TITLE, AUTHOR, CATEGORY = "title", "author", "category"
+KINDS = (TITLE, AUTHOR, CATEGORY)
+
+
+def normalize(text: str) -> str:
+    """Lowercase ASCII-folded text with single spaces ("Gödel  Prize" -> "godel prize")."""
+    folded = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return " ".join(folded.lower().split())
+
+
+class Suggestion(NamedTuple):
+    kind: str
+    text: str      # what goes into the search box
+    count: int     # papers seen with it
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+class SuggestIndex:
+    """
+    Prefix index for search-box suggestions over titles, author names and
+    category codes of every paper the strategy sees.
+
+    Keys are normalized strings in a sorted array, so a lookup is a few
+    bisects and a short scan. Authors are keyed by both "given family" and
+    "family given" so either half of a name finds them. New keys go to a
+    small sorted buffer first; once it holds merge_threshold keys it is
+    frozen and merged into a new main array outside the lock, which is then
+    swapped in, so lookups never wait on a merge. Counts live in a dict and
+    update in place. Beyond max_terms the least used titles and authors are
+    dropped, down to three quarters of it. Lookups scan at most max_scan
+    keys per array, so one-letter prefixes rank only the alphabetically
+    first matches.
+    """
+
+    def __init__(self, max_terms: int = 100000, max_papers: int = 50000,
+                 merge_threshold: int = 1024, max_scan: int = 256):
+        self.max_terms = max_terms
+        self.max_papers = max_papers
+        self.merge_threshold = merge_threshold
+        # Keys examined per lookup; bounds the cost of one-letter prefixes
+        self.max_scan = max_scan
+
+        self._keys: List[str] = []
+        self._terms: List[Tuple[str, str]] = []            # (kind, text) parallel to _keys
+        self._pending_keys: List[str] = []
+        self._pending_terms: List[Tuple[str, str]] = []
+        self._frozen_keys: List[str] = []                  # pending keys being merged
+        self._frozen_terms: List[Tuple[str, str]] = []
+        self._merging = False
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._seen: "OrderedDict[str, None]" = OrderedDict()  # paper IDs already counted
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def add(self, records: Iterable[PaperRecord]) -> int:
+        """Count the titles, authors and categories of papers not seen yet. Returns how many were new."""
+        added = 0
+        with self._lock:
+            for record in records:
+                if record.arxiv_id in self._seen:
+                    continue
+                self._seen[record.arxiv_id] = None
+                added += 1
+                if record.title:
+                    self._count(TITLE, " ".join(record.title.split()))
+                for name in record.authors:
+                    self._count(AUTHOR, name)
+                for category in record.categories:
+                    self._count(CATEGORY, category)
+            while len(self._seen) > self.max_papers:
+                self._seen.popitem(last=False)
+            merge = len(self._pending_keys) >= self.merge_threshold and not self._merging
+            if merge:
+                self._merging = True
+                self._frozen_keys, self._frozen_terms = self._pending_keys, self._pending_terms
+                self._pending_keys, self._pending_terms = [], []
+                trim = len(self._counts) > self.max_terms
+        if merge:
+            self._merge(trim)
+        return added
+
+    def add_terms(self, kind: str, texts: Iterable[str]) -> None:
+        """Seed suggestions that need no paper, e.g. the category codes the app offers."""
+        with self._lock:
+            for text in texts:
+                self._count(kind, text, 0)
+
+    def suggest(self, prefix: str, k: int = 8, kinds: Iterable[str] = KINDS) -> List[Suggestion]:
+        """
+        Up to k suggestions whose key starts with prefix, most used first
+        (categories, then authors, then titles on ties; shorter text first).
+        """
+        key = normalize(prefix)
+        if not key:
+            return []
+        kinds = frozenset(kinds)
+        found: Dict[Tuple[str, str], None] = {}
+        with self._lock:
+            for keys, terms in ((self._keys, self._terms), (self._frozen_keys, self._frozen_terms),
+                                (self._pending_keys, self._pending_terms)):
+                index = bisect.bisect_left(keys, key)
+                end = min(len(keys), index + self.max_scan)
+                while index < end and keys[index].startswith(key):
+                    term = terms[index]
+                    if term[0] in kinds:
+                        found[term] = None
+                    index += 1
+            counts = [(term, self._counts.get(term, 0)) for term in found]
+
+        rank = {CATEGORY: 0, AUTHOR: 1, TITLE: 2}
+        counts.sort(key=lambda tc: (-tc[1], rank[tc[0][0]], len(tc[0][1])))
+        return [Suggestion(kind, text, count) for (kind, text), count in counts[:k]]
+
+    # Internals (caller holds self._lock, except for _merge)
+
+    def _count(self, kind: str, text: str, increment: int = 1) -> None:
+        term = (kind, text)
+        count = self._counts.get(term)
+        if count is not None:
+            self._counts[term] = count + increment
+            return
+        self._counts[term] = increment
+        for key in self._term_keys(kind, text):
+            index = bisect.bisect_right(self._pending_keys, key)
+            self._pending_keys.insert(index, key)
+            self._pending_terms.insert(index, term)
+
+    @staticmethod
+    def _term_keys(kind: str, text: str) -> List[str]:
+        key = normalize(text)
+        if not key:
+            return []
+        if kind == AUTHOR:
+            given, _, family = key.rpartition(" ")
+            if given:
+                return [key, f"{family} {given}"]
+        return [key]
+
+    def _merge(self, trim: bool) -> None:
+        # Runs without the lock: the main and frozen arrays are never mutated,
+        # only replaced. The work is kept to short C calls (bisects, slices)
+        # and plain loops so lookups in other threads still get the GIL.
+        try:
+            dropped = set()
+            if trim:
+                # Least used titles and authors first; categories are kept
+                by_count: Dict[int, List[Tuple[str, str]]] = {}
+                for term, count in self._counts.copy().items():
+                    if term[0] != CATEGORY:
+                        by_count.setdefault(count, []).append(term)
+                excess = len(self._counts) - self.max_terms * 3 // 4
+                for count in sorted(by_count):
+                    if len(dropped) >= excess:
+                        break
+                    dropped.update(by_count[count][:excess - len(dropped)])
+
+            main_keys, main_terms = self._keys, self._terms
+            if dropped:
+                kept = [i for i, term in enumerate(main_terms) if term not in dropped]
+                main_keys = [main_keys[i] for i in kept]
+                main_terms = [main_terms[i] for i in kept]
+            keys: List[str] = []
+            terms: List[Tuple[str, str]] = []
+            previous = 0
+            for key, term in zip(self._frozen_keys, self._frozen_terms):
+                if term in dropped:
+                    continue
+                position = bisect.bisect_right(main_keys, key, previous)
+                keys += main_keys[previous:position]
+                terms += main_terms[previous:position]
+                keys.append(key)
+                terms.append(term)
+                previous = position
+            keys += main_keys[previous:]
+            terms += main_terms[previous:]
+
+            with self._lock:
+                for term in dropped:
+                    self._counts.pop(term, None)
+                self._keys, self._terms = keys, terms
+                self._frozen_keys, self._frozen_terms = [], []
+        finally:
+            with self._lock:
+                self._merging = False
@@ -0,0 +1,64 @@
+# tests/test_search_stream.py
+"""
+The streamed /search page against a local FakeArxivServer.
+
+    python -m unittest discover tests
+"""
+import os
+import tempfile
+import unittest
+
+import arxiv
+
+from bench.fake_arxiv import FakeArxivServer, make_corpus
+
+# The app reads its configuration at import time
+_tmp = tempfile.mkdtemp(prefix="bits-test-")
+os.environ.update(
+    QUERY_CACHE_PATH=os.path.join(_tmp, "cache.sqlite3"),
+    SESSION_PATH=os.path.join(_tmp, "sessions.sqlite3"),
+    UPSTREAM_RATE="0",
+    UPSTREAM_LIMIT_PATH="",
+    SEARCH_CACHE_TTL="0",
+)
+os.environ.pop("HARVESTER_ENABLED", None)
+
+import app as web  # noqa: E402
+
+
+class StreamedSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeArxivServer(make_corpus(50))
+        self.server.start()
+        arxiv.Client.query_url_format = self.server.url + "?{}"
+        web.query_cache.clear()
+        web.strategy.paper_cache.clear()
+        self.client = web.app.test_client()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_fresh_results_have_no_stale_notice(self):
+        response = self.client.get("/search?query=learning&stream=1")
+        html = response.get_data(as_text=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('class="paper"', html)
+        self.assertNotIn('id="stale-notice"', html)
+        self.assertTrue(response.cache_control.no_store)
+
+    def test_stale_results_show_the_notice(self):
+        # Expired entries (SEARCH_CACHE_TTL=0) are served while arXiv is down
+        self.client.get("/search?query=learning&stream=1").get_data()
+        self.server.stop()
+        web.upstream.breaker.record_success()
+
+        response = self.client.get("/search?query=learning&stream=1")
+        html = response.get_data(as_text=True)
+        self.assertIn('class="paper"', html)
+        self.assertIn('id="stale-notice"', html)
+        self.assertGreater(html.index('id="stale-notice"'), html.index('id="paper-list"'))
+        self.assertTrue(response.cache_control.no_store)
+
+
+if __name__ == "__main__":
+    unittest.main()